@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark the resolver against mock_watttime.py (no network, no quota).
+
+Usage:
+  python bench_resolver.py [--datasets azure,aws,gcp,all,synthetic] [--synthetic 10000]
+                           [--modes sequential,concurrent,cached,hedged] [--concurrency 16]
+                           [--latency lognormal:20:0.5] [--p429 0.02] [--p5xx 0.01] [--token-ttl 1800]
+                           [--out bench.json] [--baseline old_bench.json --max-regression 0.2]
+
+Notes:
+- sequential = concurrency 1, no cache; concurrent = --concurrency, no cache;
+  cached = the concurrent run repeated against a cache warmed by an unmeasured run;
+  hedged = concurrent with --hedge (reports the hedge rate; try --latency lognormal:20:1.0).
+- Reports rows/sec, p50/p99 per-lookup latency (cache hits included) and request counts,
+  both as seen by the client and by the mock server, as JSON.
+- With --baseline, exits 1 if any dataset/mode lost more than --max-regression of its
+  rows/sec, so CI catches resolver slowdowns.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+
+import watttime_resolver
+from mock_watttime import MockWattTime, add_mock_args
+from hedging import HedgePolicy
+from region_cache import RegionCache
+from resolve import DEFAULT_ROWS_DIR
+from row_sources import load_rows, find_rows_file
+from watttime_auth import TokenManager
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100.0 * len(ordered)) - 1))]
+
+def synthetic_rows(n, seed=7):
+    rng = random.Random(seed)
+    return [(f"syn-{i}", "", "", "", "", round(rng.uniform(-55, 70), 4), round(rng.uniform(-180, 180), 4), "")
+            for i in range(n)]
+
+def load_datasets(names, rows_dir, synthetic):
+    datasets = {}
+    for name in names:
+        if name == "synthetic":
+            datasets[f"synthetic{synthetic}"] = synthetic_rows(synthetic)
+        elif name == "all":
+            datasets["all"] = [tup for cloud in ("azure", "aws", "gcp")
+                               for tup in load_rows(find_rows_file(rows_dir, cloud))]
+        else:
+            datasets[name] = load_rows(find_rows_file(rows_dir, name))
+    return datasets
+
+
+@contextlib.contextmanager
+def timed_lookups(latencies):
+    """Record the wall time of every region_from_loc call made by the resolver."""
+    original = watttime_resolver.region_from_loc
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    watttime_resolver.region_from_loc = timed
+    try:
+        yield
+    finally:
+        watttime_resolver.region_from_loc = original
+
+
+def run_once(mock, rows, concurrency, rate, cache=None, hedge=None, quiet=True):
+    tokens = TokenManager("bench", "bench", path=None, login_url=f"{mock.base_url}/login")
+    stats = watttime_resolver.ResolveStats()
+    limiter = watttime_resolver.AdaptiveRateLimiter(rate=rate, max_rate=rate)
+    latencies = []
+    before = dict(mock.counters)
+    out = open(os.devnull, "w") if quiet else sys.stdout
+    start = time.perf_counter()
+    with timed_lookups(latencies), contextlib.redirect_stdout(out):
+        watttime_resolver.resolve_rows(rows, tokens, concurrency=concurrency, cache=cache, stats=stats,
+                                       limiter=limiter, hedge=hedge)
+    seconds = time.perf_counter() - start
+    if quiet:
+        out.close()
+    server = {k: mock.counters[k] - before.get(k, 0) for k in mock.counters}
+    return {
+        "rows": len(rows),
+        "unique_lookups": stats.unique,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(len(rows) / seconds, 2) if seconds else None,
+        "latency_ms": {"p50": _ms(percentile(latencies, 50)), "p99": _ms(percentile(latencies, 99))},
+        "client_requests": stats.requests,
+        "server_requests": server,
+        "cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
+        "hedge": {"calls": hedge.calls, "hedged": hedge.hedged, "wins": hedge.hedge_wins} if hedge is not None else None,
+    }
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 3)
+
+
+def run_benchmarks(args):
+    mock = MockWattTime(latency=args.latency, p429=args.p429, p5xx=args.p5xx, retry_after=args.retry_after,
+                        token_ttl=args.token_ttl, seed=args.seed).start()
+    watttime_resolver.REGION_FROM_LOC_URL = f"{mock.base_url}/v3/region-from-loc"
+    datasets = load_datasets([d.strip() for d in args.datasets.split(",") if d.strip()],
+                             args.rows_dir, args.synthetic)
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    results = []
+    try:
+        for name, rows in datasets.items():
+            for mode in modes:
+                if mode == "sequential":
+                    result = run_once(mock, rows, 1, args.rate)
+                elif mode == "concurrent":
+                    result = run_once(mock, rows, args.concurrency, args.rate)
+                elif mode == "cached":
+                    with tempfile.TemporaryDirectory() as tmp:
+                        cache = RegionCache(os.path.join(tmp, "bench.sqlite"))
+                        run_once(mock, rows, args.concurrency, args.rate, cache=cache)
+                        cache.hits = cache.misses = 0
+                        result = run_once(mock, rows, args.concurrency, args.rate, cache=cache)
+                        cache.close()
+                elif mode == "hedged":
+                    hedge = HedgePolicy(workers=2 * args.concurrency)
+                    result = run_once(mock, rows, args.concurrency, args.rate, hedge=hedge)
+                    hedge.close()
+                else:
+                    raise SystemExit(f"unknown mode {mode!r}")
+                result = {"dataset": name, "mode": mode, **result}
+                print(f"[BENCH] {name:>16} {mode:>10}: {result['rows_per_sec']} rows/s, "
+                      f"p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms",
+                      file=sys.stderr)
+                results.append(result)
+    finally:
+        mock.stop()
+    return {
+        "config": {k: getattr(args, k) for k in ("latency", "p429", "p5xx", "retry_after", "token_ttl",
+                                                  "concurrency", "rate", "seed")},
+        "results": results,
+    }
+
+def regressions(report, baseline, max_regression):
+    old = {(r["dataset"], r["mode"]): r for r in baseline.get("results", [])}
+    found = []
+    for r in report["results"]:
+        prev = old.get((r["dataset"], r["mode"]))
+        if prev and prev.get("rows_per_sec") and r["rows_per_sec"] is not None:
+            if r["rows_per_sec"] < prev["rows_per_sec"] * (1.0 - max_regression):
+                found.append(f"{r['dataset']}/{r['mode']}: {prev['rows_per_sec']} -> {r['rows_per_sec']} rows/s")
+    return found
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the WattTime region resolver against a local mock")
+    ap.add_argument("--datasets", default="azure,aws,gcp,all,synthetic", help="azure,aws,gcp,all,synthetic")
+    ap.add_argument("--synthetic", type=int, default=10000, help="Points in the synthetic table")
+    ap.add_argument("--rows-dir", default=DEFAULT_ROWS_DIR, help="Directory holding <cloud>.csv/.json/.yaml")
+    ap.add_argument("--modes", default="sequential,concurrent,cached", help="sequential,concurrent,cached,hedged")
+    ap.add_argument("--concurrency", type=int, default=16, help="Concurrency for concurrent/cached modes")
+    ap.add_argument("--rate", type=float, default=10000.0, help="Fixed client rate limit, req/s")
+    ap.add_argument("--out", default=None, help="Write the JSON report here (default: stdout)")
+    ap.add_argument("--baseline", default=None, help="Previous JSON report to compare rows/sec against")
+    ap.add_argument("--max-regression", type=float, default=0.2, help="Allowed rows/sec drop vs. baseline (0.2 = 20%%)")
+    add_mock_args(ap)
+    args = ap.parse_args()
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            found = regressions(report, json.load(f), args.max_regression)
+        for line in found:
+            print(f"[REGRESSION] {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Bulk WattTime region resolution for arbitrary coordinates (edge sites, colos, customers).
+
+Usage:
+  python bulk_resolve.py points.csv out.csv [--id-col id --lat-col lat --lon-col lon] [--grid 0.05]
+  python bulk_resolve.py points.f64 out.ndjson [--dtype f8]   # raw little-endian (lat, lon) pairs
+  python bulk_resolve.py points.npy out.csv                   # (n, 2) float array
+                         [--chunk-size 5000] [--memo-size 200000] [--concurrency 16] [--offline] ...
+
+Notes:
+- Input is streamed: CSV row by row, binary files through a read-only memory map, so the
+  point file is never loaded as a whole. Without an id column the record number is the id.
+- Every point is snapped to the nearest node of a --grid degree lattice; points sharing a
+  node share one lookup. Within a chunk that is the resolver's own de-duplication, across
+  chunks a bounded in-memory memo (--memo-size nodes, least recently used evicted) and the
+  disk cache answer repeats without a request. Failed nodes are memoized too, so a node
+  outside WattTime coverage is only asked about once per run.
+- Lookups go through the same region_from_loc / normalize_region_abbrev path as resolve.py
+  (rate limiter, retries, cache, circuit breaker and last-known-good fallback, --offline);
+  at most --chunk-size points are held at once.
+- Output is .csv or .ndjson/.jsonl (by extension), one record per point and signal, in
+  completion order: id, lat, lon, grid_lat, grid_lon, signal, abbrev, status, error.
+"""
+
+import os
+import sys
+import csv
+import json
+import argparse
+from collections import OrderedDict
+
+from metrics import add_metrics_args, instrumented_run
+from ndjson_output import record_status
+from watttime_auth import CredentialsError, TokenManager
+from watttime_resolver import (add_common_args, open_breaker, open_cache, open_fallback, open_hedge,
+                               open_region_index, resolve_kwargs, run_deadline, signal_list, stream_rows,
+                               worker_limit, make_session, AdaptiveRateLimiter)
+
+
+OUTPUT_FIELDS = ("id", "lat", "lon", "grid_lat", "grid_lon", "signal", "abbrev", "status", "error")
+BINARY_EXTENSIONS = (".npy", ".bin", ".f64", ".f32")
+_PROGRESS_EVERY = 50000
+
+
+def snap(value, grid):
+    """Nearest multiple of `grid` (degrees); grid <= 0 leaves the value untouched."""
+    if grid <= 0:
+        return value
+    return round(round(value / grid) * grid, 9)
+
+
+def iter_csv_points(path, id_col="id", lat_col="lat", lon_col="lon"):
+    """Yield (id, lat, lon) from a headed CSV; unparsable rows are skipped with a warning."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in (lat_col, lon_col) if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+        for n, rec in enumerate(reader):
+            try:
+                lat, lon = float(rec[lat_col]), float(rec[lon_col])
+            except (TypeError, ValueError):
+                print(f"[WARN] {path}: record {n} has no usable lat/lon, skipped")
+                continue
+            yield (rec.get(id_col) or str(n), lat, lon)
+
+def iter_binary_points(path, dtype="f8", block=65536):
+    """
+    Yield (record_number, lat, lon) from a memory-mapped binary point file: an .npy array of
+    shape (n, 2), or raw little-endian (lat, lon) pairs of `dtype` (f8 or f4).
+    """
+    import numpy as np
+    if path.lower().endswith(".npy"):
+        points = np.load(path, mmap_mode="r")
+    else:
+        if os.path.getsize(path) == 0:
+            return
+        points = np.memmap(path, dtype=np.dtype(dtype).newbyteorder("<"), mode="r")
+        if len(points) % 2:
+            raise ValueError(f"{path}: odd number of values, expected (lat, lon) pairs")
+        points = points.reshape(-1, 2)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"{path}: expected an (n, 2) array of (lat, lon), got shape {points.shape}")
+    for start in range(0, len(points), block):
+        # only this block is paged in and converted
+        for offset, (lat, lon) in enumerate(points[start:start + block].tolist()):
+            yield (str(start + offset), lat, lon)
+
+def iter_points(path, dtype="f8", id_col="id", lat_col="lat", lon_col="lon"):
+    if path.lower().endswith(BINARY_EXTENSIONS):
+        return iter_binary_points(path, dtype=dtype)
+    return iter_csv_points(path, id_col, lat_col, lon_col)
+
+
+class BulkWriter:
+    """Streams one record per (point, signal) to CSV or NDJSON, chosen by extension."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ndjson = path.lower().endswith((".ndjson", ".jsonl"))
+        self.written = 0
+        self.failed = 0
+        self._out = open(path, "w", encoding="utf-8", newline="")
+        if not self.ndjson:
+            self._csv = csv.writer(self._out)
+            self._csv.writerow(OUTPUT_FIELDS)
+
+    def write(self, point_id, lat, lon, grid_lat, grid_lon, signal, abbrev, error):
+        status = record_status(error)
+        if self.ndjson:
+            record = dict(zip(OUTPUT_FIELDS, (point_id, lat, lon, grid_lat, grid_lon, signal, abbrev, status)))
+            if error is not None:
+                record["error"] = str(error)
+            self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            self._csv.writerow((point_id, lat, lon, grid_lat, grid_lon, signal, abbrev or "", status,
+                                "" if error is None else str(error)))
+        if error is None:
+            self.written += 1
+        else:
+            self.failed += 1
+        total = self.written + self.failed
+        if total % _PROGRESS_EVERY == 0:
+            self._out.flush()
+            print(f"[BULK] {total} records written ({self.failed} failed)")
+
+    def summary(self):
+        return f"[BULK] {self.written} resolved, {self.failed} failed -> {self.path}"
+
+    def close(self):
+        self._out.close()
+
+
+def bulk_resolve(points, writer, token, signals=("co2_moer",), grid=0.01, memo_size=200000,
+                 chunk_size=5000, **kwargs):
+    """
+    Resolve an iterable of (id, lat, lon) into `writer`, snapping to `grid` first.
+    Grid nodes answered earlier in the run are served from the memo and never reach the
+    resolver; everything else is streamed through stream_rows in `chunk_size` batches.
+    Returns the ResolveStats.
+    """
+    signals = list(dict.fromkeys(signals))
+    memo = OrderedDict()  # (grid_lat, grid_lon, signal) -> (abbrev, error)
+    memo_hits = 0
+
+    def remember(key, value):
+        memo[key] = value
+        memo.move_to_end(key)
+        if len(memo) > memo_size:
+            memo.popitem(last=False)
+
+    def pending():
+        nonlocal memo_hits
+        for point_id, lat, lon in points:
+            glat, glon = snap(lat, grid), snap(lon, grid)
+            known = [memo.get((glat, glon, sig)) for sig in signals]
+            if all(k is not None for k in known):
+                memo_hits += 1
+                for sig, (abbrev, error) in zip(signals, known):
+                    memo.move_to_end((glat, glon, sig))
+                    writer.write(point_id, lat, lon, glat, glon, sig, abbrev, error)
+                continue
+            # the tuple's lat/lon are the grid node, so the whole chunk plans/caches per node
+            yield (point_id, lat, lon), (str(point_id), "", "", "", "", glat, glon, "")
+
+    def sink(tag, tup, error, signal):
+        point_id, lat, lon = tag
+        glat, glon, abbrev = tup[5], tup[6], tup[7]
+        abbrev = abbrev if record_status(error) != "failed" else None
+        remember((glat, glon, signal), (abbrev, error))
+        writer.write(point_id, lat, lon, glat, glon, signal, abbrev, error)
+
+    stats = stream_rows(pending(), token, sink, signals=signals, chunk_size=chunk_size, log_rows=False, **kwargs)
+    print(f"[BULK] {memo_hits} points answered from the in-memory grid memo")
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Resolve a large file of lat/lon points to WattTime regions.")
+    ap.add_argument("input", help="Point file: .csv, or .npy/.bin/.f64/.f32 (memory-mapped)")
+    ap.add_argument("output", help="Result file: .csv or .ndjson/.jsonl")
+    ap.add_argument("--id-col", default="id", help="CSV id column (default: id; record number if absent)")
+    ap.add_argument("--lat-col", default="lat", help="CSV latitude column")
+    ap.add_argument("--lon-col", default="lon", help="CSV longitude column")
+    ap.add_argument("--dtype", default="f8", choices=("f8", "f4"),
+                    help="Value type of raw binary point files (default: f8; .f32 implies f4)")
+    ap.add_argument("--grid", type=float, default=0.01,
+                    help="Snap points to this lattice (degrees) before lookup; 0 disables (default: 0.01)")
+    ap.add_argument("--chunk-size", type=int, default=5000, help="Points planned/held in memory at once")
+    ap.add_argument("--memo-size", type=int, default=200000, help="Grid nodes remembered across chunks")
+    add_common_args(ap)
+    add_metrics_args(ap)
+    args = ap.parse_args(argv)
+
+    dtype = "f4" if args.input.lower().endswith(".f32") else args.dtype
+    with instrumented_run(args):
+        deadline = run_deadline(args)
+        tokens = TokenManager.from_env()
+        index = open_region_index(args, tokens.get)
+        cache = open_cache(args)
+        session = make_session(worker_limit(args))
+        limiter = AdaptiveRateLimiter(rate=args.rate, max_rate=args.max_rate)
+        writer = BulkWriter(args.output)
+        try:
+            bulk_resolve(iter_points(args.input, dtype, args.id_col, args.lat_col, args.lon_col), writer, tokens,
+                         signals=signal_list(args), grid=args.grid, memo_size=args.memo_size,
+                         chunk_size=args.chunk_size, cache=cache, index=index, session=session, limiter=limiter,
+                         hedge=open_hedge(args), breaker=open_breaker(args), fallback=open_fallback(args),
+                         deadline=deadline, max_concurrency=worker_limit(args),
+                         **resolve_kwargs(args))
+        except CredentialsError as e:
+            raise SystemExit(str(e))
+        finally:
+            writer.close()
+            print(writer.summary())
+            if cache is not None:
+                print(cache.summary())
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
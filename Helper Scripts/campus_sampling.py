@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Campus sampling: resolve each row from several points around its coordinate and take the
+majority abbrev, for rows whose city-center coordinate sits near a grid boundary
+(e.g. "Boardman/The Dalles", "Gävle/Sandviken", "Tokyo/Saitama").
+
+Usage:
+  python resolve.py --samples 7 [--sample-radius-km 25] [--samples-initial 3] [--sample-budget 200] ...
+
+Notes:
+- Point 0 is the row's own coordinate; the next --samples-initial - 1 points sit evenly on
+  a circle of --sample-radius-km around it, the rest fill the disc in a sunflower pattern.
+  Points are deterministic, so repeated runs hit the lookup cache.
+- Round 1 resolves the initial points of every row; only rows whose answers disagree are
+  expanded to all --samples points in round 2 (least confident rows first).
+- Every round goes through stream_rows, i.e. the usual de-duplication, cache, rate limiter,
+  circuit breaker and fallback. Points shared between rows are looked up once.
+- --sample-budget caps the extra lookups beyond the row coordinates themselves, across the
+  whole run. Points already in the cache or planned earlier are free; once the budget is
+  spent, the remaining rows keep the samples they have.
+- The row's abbrev becomes the majority of its answered samples (ties go to the center's
+  answer); confidence is the majority's share of those answers.
+"""
+
+import math
+
+from ndjson_output import record_status
+from watttime_resolver import quantize, stream_rows
+
+
+KM_PER_DEGREE = 111.32
+GOLDEN_ANGLE = math.pi * (3.0 - math.sqrt(5.0))
+
+
+def sample_points(lat, lon, samples=7, radius_km=25.0, initial=3):
+    """`samples` (lat, lon) points around (lat, lon), the row's own coordinate first."""
+    offsets = [(0.0, 0.0)]
+    ring = max(0, min(initial, samples) - 1)
+    for i in range(ring):
+        angle = 2.0 * math.pi * i / ring
+        offsets.append((radius_km * math.cos(angle), radius_km * math.sin(angle)))
+    fill = samples - len(offsets)
+    for i in range(fill):
+        r = radius_km * math.sqrt((i + 0.5) / fill)
+        angle = i * GOLDEN_ANGLE + math.pi / max(1, ring)  # start between the ring points
+        offsets.append((r * math.cos(angle), r * math.sin(angle)))
+
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    points = []
+    for north, east in offsets:
+        plat = max(-90.0, min(90.0, lat + north / KM_PER_DEGREE))
+        plon = (lon + east / (KM_PER_DEGREE * cos_lat) + 180.0) % 360.0 - 180.0
+        points.append((plat, plon))
+    return points
+
+def vote(answers, center=None):
+    """
+    (abbrev, confidence, {abbrev: votes}) over the answered samples, in sample order.
+    Ties go to `center`, then to the abbrev seen first; no answers -> (None, 0.0, {}).
+    """
+    counts = {}
+    for abbrev in answers:
+        counts[abbrev] = counts.get(abbrev, 0) + 1
+    if not counts:
+        return None, 0.0, {}
+    winner = max(counts, key=lambda a: (counts[a], a == center))
+    return winner, counts[winner] / len(answers), counts
+
+
+def _resolve_points(points, token, signal, precision, **kwargs):
+    """{quantized (lat, lon): abbrev or None} for `points`, one stream_rows pass."""
+    answers = {}
+
+    def sink(key, tup, error, _signal):
+        answers[key] = tup[7] if record_status(error) != "failed" and tup[7] != "UNKNOWN" else None
+
+    rows = [(quantize(lat, lon, precision), (f"sample@{lat:.4f},{lon:.4f}", "", "", "", "", lat, lon, ""))
+            for lat, lon in points]
+    if rows:
+        stream_rows(rows, token, sink, signals=[signal], precision=precision, chunk_size=len(rows),
+                    log_rows=False, **kwargs)
+    return answers
+
+
+def campus_resolve(rows, token, samples=7, radius_km=25.0, initial=3, budget=200, signal="co2_moer",
+                   precision=4, cache=None, index=None, **kwargs):
+    """
+    Resolve rows by majority vote over sampled points (see module notes); remaining keyword
+    arguments go to stream_rows. Returns (updated_rows, mapping, report) with one report
+    dict per row: region, abbrev, center, confidence, answered, votes, expanded.
+    """
+    initial = max(1, min(initial, samples))
+    points = [sample_points(tup[5], tup[6], samples, radius_km, initial) for tup in rows]
+    planned = set()
+    spent = 0
+
+    def free(key):
+        if key in planned or index is not None:
+            return True
+        if cache is None or cache.refresh:
+            return False
+        age = cache.age(key[0], key[1], signal)
+        return age is not None and (cache.ttl is None or age <= cache.ttl)
+
+    def allocate(row_points, extra_from):
+        """Points of one row that fit the budget; the row's own coordinate is never charged."""
+        nonlocal spent
+        chosen = []
+        for n, (lat, lon) in enumerate(row_points):
+            key = quantize(lat, lon, precision)
+            if n >= extra_from and not free(key):
+                if spent >= budget:
+                    break
+                spent += 1
+            planned.add(key)
+            chosen.append((lat, lon))
+        return chosen
+
+    taken = [allocate(p[:initial], 1) for p in points]
+    answers = _resolve_points([pt for row in taken for pt in row], token, signal, precision, cache=cache,
+                              index=index, **kwargs)
+
+    def tally(i):
+        got = [answers.get(quantize(lat, lon, precision)) for lat, lon in taken[i]]
+        return vote([a for a in got if a], center=got[0])
+
+    disputed = sorted((i for i in range(len(rows)) if len(tally(i)[2]) > 1), key=lambda i: tally(i)[1])
+    expanded, todo = set(), []
+    for n, i in enumerate(disputed):
+        if spent >= budget:
+            print(f"[CAMPUS] sample budget of {budget} spent, {len(disputed) - n} disputed rows not expanded")
+            break
+        more = allocate(points[i][len(taken[i]):], 0)
+        taken[i] += more
+        if more:
+            expanded.add(i)
+            todo += [pt for pt in more if quantize(pt[0], pt[1], precision) not in answers]
+    if todo:
+        answers.update(_resolve_points(todo, token, signal, precision, cache=cache, index=index, **kwargs))
+
+    updated_rows, report = [], []
+    for i, tup in enumerate(rows):
+        center = answers.get(quantize(tup[5], tup[6], precision))
+        got = [answers.get(quantize(lat, lon, precision)) for lat, lon in taken[i]]
+        abbrev, confidence, votes = vote([a for a in got if a], center=center)
+        updated_rows.append(tuple(tup[:7]) + (abbrev or tup[7],))
+        report.append({"region": tup[0], "abbrev": abbrev or tup[7], "center": center,
+                       "confidence": round(confidence, 3), "answered": sum(votes.values()),
+                       "sampled": len(got), "votes": votes, "expanded": i in expanded})
+    print(f"[CAMPUS] {len(rows)} rows, {len(disputed)} disputed after {initial} samples, {len(expanded)} expanded "
+          f"to {samples}; {spent} of {budget} budgeted extra lookups used")
+    return updated_rows, {tup[0]: tup[7] for tup in updated_rows}, report
+
+def print_campus_report(report):
+    """One line per row that was disputed or moved off its center's answer."""
+    for entry in report:
+        if entry["confidence"] < 1.0 or entry["abbrev"] != entry["center"]:
+            votes = ", ".join(f"{a} {n}" for a, n in sorted(entry["votes"].items(), key=lambda kv: -kv[1]))
+            moved = f"; center said {entry['center']}" if entry["abbrev"] != entry["center"] else ""
+            print(f"[CAMPUS] {entry['region']:>22} -> {entry['abbrev']} (confidence {entry['confidence']:.2f}, "
+                  f"{entry['answered']}/{entry['sampled']} samples: {votes}{moved})")
+
+
+def add_campus_args(ap):
+    ap.add_argument("--samples", type=int, default=0,
+                    help="Resolve each row by majority vote over this many points around it (default: off)")
+    ap.add_argument("--sample-radius-km", type=float, default=25.0, help="Radius of the sampled disc (default: 25)")
+    ap.add_argument("--samples-initial", type=int, default=3,
+                    help="Points tried first; rows expand to --samples only if these disagree (default: 3)")
+    ap.add_argument("--sample-budget", type=int, default=200,
+                    help="Max extra lookups for sample points across the run (default: 200)")
+    return ap
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker for WattTime calls, plus the last-known-good snapshot rows fall back to
+while the API is down.
+
+Notes:
+- The breaker counts consecutive failed attempts (timeouts, connection errors, 5xx).
+  After `threshold` of them it opens: every further attempt fails at once with
+  CircuitOpenError instead of waiting out its retries and timeouts. After `cooldown`
+  seconds a single probe is let through; success closes the breaker, failure re-opens it.
+  Any other answer (2xx, 4xx, 429) means the API is up and resets the count.
+- LastKnownGood persists the last successful abbrev per (quantized lat, lon, signal) in a
+  JSON file. A lookup that fails (breaker open or not) is answered from it when possible;
+  the answer carries a StaleAnswer error so callers can mark it stale rather than fresh.
+- Entries are only ever overwritten by a newer answer, never expired: a stale abbrev
+  is still a better fallback than the empty seed. Each entry keeps the time its answer
+  was fetched from WattTime, so an answer served from the lookup cache keeps its original
+  time instead of the current run's.
+"""
+
+import os
+import json
+import time
+import threading
+
+from metrics import METRICS
+from region_cache import CACHE_DIR
+
+
+DEFAULT_FALLBACK_PATH = os.path.join(CACHE_DIR, "last_known_good.json")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the breaker is open."""
+
+
+class StaleAnswer(Exception):
+    """The live lookup failed; the abbrev came from the last-known-good snapshot."""
+
+    def __init__(self, resolved_at, cause):
+        super().__init__(f"last known good from {resolved_at}; live lookup failed: {cause}")
+        self.resolved_at = resolved_at
+        self.cause = cause
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.trips = 0
+        self.short_circuited = 0
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if not self._probing and time.monotonic() - self._opened_at >= self.cooldown:
+                self._probing = True  # half-open: exactly one probe
+                return
+            self.short_circuited += 1
+        METRICS.incr("circuit_short_circuited_total")
+        raise CircuitOpenError(f"circuit open after {self.threshold} consecutive failures")
+
+    def on_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                print("[BREAKER] probe succeeded, circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def on_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing:
+                self._opened_at = time.monotonic()
+                self._probing = False
+            elif self._opened_at is None and self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                METRICS.incr("circuit_trips_total")
+                print(f"[BREAKER] {self._failures} consecutive failures, circuit open "
+                      f"(probing again in {self.cooldown:g}s)")
+
+    def on_abandoned(self):
+        """The attempt was given up before reaching the API (e.g. at a deadline): neither outcome."""
+        with self._lock:
+            self._probing = False
+
+    def summary(self):
+        state = "open" if self.is_open else "closed"
+        return f"[BREAKER] {state}; tripped {self.trips}x, {self.short_circuited} requests short-circuited"
+
+
+class LastKnownGood:
+    def __init__(self, path=DEFAULT_FALLBACK_PATH, precision=4):
+        self.path = path
+        self.precision = precision
+        self.started = time.time()
+        self.served = 0
+        self._confirmed = set()  # keys answered (live or from the cache) during this run
+        self._entries = {}  # key -> {"abbrev", "resolved_at", "ts"}
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            pass
+
+    def key(self, lat, lon, signal):
+        return f"{signal}|{lat:.{self.precision}f}|{lon:.{self.precision}f}"
+
+    def put(self, lat, lon, signal, abbrev, fetched_at=None):
+        """Record an answer fetched from WattTime at `fetched_at` (unix seconds, default now)."""
+        if not abbrev or abbrev == "UNKNOWN":
+            return
+        ts = time.time() if fetched_at is None else fetched_at
+        key = self.key(lat, lon, signal)
+        with self._lock:
+            self._confirmed.add(key)
+            entry = self._entries.get(key)
+            if entry is not None and entry["abbrev"] == abbrev and entry["ts"] >= ts:
+                return
+            self._entries[key] = {
+                "abbrev": abbrev, "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)), "ts": ts}
+            self._dirty = True
+
+    def get(self, lat, lon, signal):
+        """(abbrev, resolved_at) for the point, or None."""
+        with self._lock:
+            entry = self._entries.get(self.key(lat, lon, signal))
+        return (entry["abbrev"], entry["resolved_at"]) if entry else None
+
+    def age(self, lat, lon, signal):
+        """Seconds since the point was last resolved live, or None."""
+        with self._lock:
+            entry = self._entries.get(self.key(lat, lon, signal))
+        return None if entry is None else max(0.0, time.time() - entry["ts"])
+
+    def fallback(self, lat, lon, signal, error):
+        """(abbrev, StaleAnswer) if the snapshot knows the point, else (None, error)."""
+        known = self.get(lat, lon, signal)
+        if known is None:
+            return None, error
+        with self._lock:
+            self.served += 1
+        return known[0], StaleAnswer(known[1], error)
+
+    def status(self, lat, lon, signal):
+        """
+        'fresh' if fetched live during this run, 'cached' if answered this run from an older
+        cached fetch, 'stale' if the lookup failed and only an older answer exists, else 'failed'.
+        """
+        key = self.key(lat, lon, signal)
+        with self._lock:
+            entry = self._entries.get(key)
+            confirmed = key in self._confirmed
+        if entry is None:
+            return "failed"
+        if entry["ts"] >= self.started:
+            return "fresh"
+        return "cached" if confirmed else "stale"
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"version": 1, "precision": self.precision, "entries": self._entries}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"), sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    def summary(self):
+        return f"[FALLBACK] {self.served} lookups answered from the last-known-good snapshot ({self.path})"
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Long-running drift monitor: keeps re-verifying every (cloud, region) -> WattTime region
+assignment at a steady, budgeted pace and alerts when one changes.
+
+Usage:
+  python drift_monitor.py [--cloud azure,aws,gcp] [--budget-per-hour 60] [--min-age 86400]
+                          [--alerts drift_alerts.ndjson] [--state ~/.cache/watttime/drift_state.json]
+                          [--static-map ../CarbonAware.RegionMap/StaticRegionMapper.cs] [--once]
+
+Notes:
+- Every row is kept in a priority queue keyed by when it is next due, i.e. its last
+  verification time + --min-age (never-verified rows first). The stalest due row is
+  re-resolved live (the lookup cache is bypassed), then pushed back.
+- Requests are spread evenly: after each check the monitor sleeps 3600 / --budget-per-hour
+  seconds per HTTP request it used (retries included), so a full sweep of N rows costs N
+  requests spread over N / budget hours rather than one burst.
+- Alerts are JSON lines appended to --alerts (and echoed as [ALERT]):
+    {"kind": "changed", ...}          the abbrev differs from the last verified one
+    {"kind": "static_mismatch", ...}  the abbrev differs from StaticRegionMapper.cs
+  A static mismatch is reported once per (static, current) pair, not on every check.
+- Verification times and abbrevs persist in --state after every check, so a restarted
+  monitor resumes where it stopped. StaticRegionMapper.cs is re-read when it changes on disk.
+- A failed lookup is retried after --retry-delay seconds without touching the stored state.
+- --once checks every row that is due (each at most once), then exits (cron-friendly);
+  otherwise the monitor runs until interrupted.
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+
+from region_cache import CACHE_DIR
+from resolve import DEFAULT_ROWS_DIR, load_clouds
+from static_map import DEFAULT_STATIC_MAP, parse_static_map, read_static_map
+from watttime_auth import CredentialsError, TokenManager
+from watttime_resolver import (region_from_loc, normalize_region_abbrev, make_session, ResolveStats,
+                               AdaptiveRateLimiter)
+
+
+DEFAULT_DRIFT_STATE = os.path.join(CACHE_DIR, "drift_state.json")
+DEFAULT_ALERTS = "drift_alerts.ndjson"
+
+
+def _now_iso():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def state_key(cloud, region):
+    return f"{cloud.lower()}/{region.lower()}"
+
+
+def load_drift_state(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_drift_state(state, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+class StaticMapWatcher:
+    """StaticRegionMapper.cs abbrevs by lowercased (cloud, region), re-parsed when the file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._entries = {}
+
+    def abbrev(self, cloud, region):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            self._entries = parse_static_map(read_static_map(self.path))
+            self._mtime = mtime
+        entry = self._entries.get((cloud.lower(), region.lower()))
+        return entry["abbrev"] if entry else None
+
+
+class DriftMonitor:
+    def __init__(self, rows_by_cloud, token, state_path=DEFAULT_DRIFT_STATE, alerts_path=DEFAULT_ALERTS,
+                 static_map=DEFAULT_STATIC_MAP, signal="co2_moer", budget_per_hour=60.0, min_age=86400.0,
+                 retry_delay=900.0, timeout=20.0, retries=3, session=None, limiter=None):
+        self.token = token
+        self.state_path = state_path
+        self.alerts_path = alerts_path
+        self.static = StaticMapWatcher(static_map) if static_map else None
+        self.signal = signal
+        self.interval = 3600.0 / max(budget_per_hour, 1e-9)
+        self.min_age = min_age
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.retries = retries
+        self.session = session or make_session(1)
+        self.limiter = limiter or AdaptiveRateLimiter(rate=1.0, max_rate=1.0)
+        self.stats = ResolveStats()
+        self.state = load_drift_state(state_path)
+        self.checks = 0
+        self.alerts = 0
+
+        self.rows = {}
+        self.queue = []  # (due, key)
+        for cloud, rows in rows_by_cloud.items():
+            for tup in rows:
+                key = state_key(cloud, tup[0])
+                self.rows[key] = (cloud, tup)
+                prev = self.state.get(key)
+                same_point = prev is not None and (prev.get("lat"), prev.get("lon"), prev.get("signal")) == (
+                    tup[5], tup[6], signal)
+                due = prev["verified_at_ts"] + min_age if same_point and prev.get("verified_at_ts") else 0.0
+                self.queue.append((due, key))
+        heapq.heapify(self.queue)
+        self.stats.rows = len(self.queue)
+
+    def alert(self, kind, cloud, tup, current, **extra):
+        record = {"ts": _now_iso(), "kind": kind, "cloud": cloud, "region": tup[0], "lat": tup[5], "lon": tup[6],
+                  "signal": self.signal, "current": current, **extra}
+        print(f"[ALERT] {json.dumps(record, ensure_ascii=False)}")
+        with open(self.alerts_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.alerts += 1
+
+    def check(self, key):
+        """Re-resolve one row; returns (next_due, requests_used)."""
+        cloud, tup = self.rows[key]
+        before = self.stats.requests
+        try:
+            data = region_from_loc(self.token, tup[5], tup[6], signal=self.signal, timeout=self.timeout,
+                                   retries=self.retries, session=self.session, stats=self.stats,
+                                   limiter=self.limiter)
+            current = normalize_region_abbrev(data)
+        except CredentialsError:
+            raise  # no check can succeed without a login
+        except Exception as e:
+            print(f"[WARN] {cloud}/{tup[0]} check failed: {e}")
+            return time.time() + self.retry_delay, self.stats.requests - before
+
+        self.checks += 1
+        prev = self.state.get(key) or {}
+        previous = prev.get("abbrev")
+        print(f"[OK] {cloud:>5} {tup[0]:>22} @ ({tup[5]:.4f}, {tup[6]:.4f}) -> {current}")
+        if previous and previous != current:
+            self.alert("changed", cloud, tup, current, previous=previous, previous_verified_at=prev.get("verified_at"))
+        static_alerted = prev.get("static_alerted")
+        static = self.static.abbrev(cloud, tup[0]) if self.static else None
+        if static and static != current:
+            if static_alerted != [static, current]:
+                self.alert("static_mismatch", cloud, tup, current, static=static)
+            static_alerted = [static, current]
+        else:
+            static_alerted = None
+
+        now = time.time()
+        self.state[key] = {"cloud": cloud, "region": tup[0], "lat": tup[5], "lon": tup[6], "signal": self.signal,
+                           "abbrev": current, "verified_at": _now_iso(), "verified_at_ts": now,
+                           "static_alerted": static_alerted}
+        save_drift_state(self.state, self.state_path)
+        return now + self.min_age, self.stats.requests - before
+
+    def run(self, once=False, sleep=time.sleep):
+        """Work the queue until interrupted (or, with once=True, until nothing unchecked is due)."""
+        checked = set()
+        while self.queue:
+            due, key = self.queue[0]
+            wait = due - time.time()
+            if once and (wait > 0 or key in checked):
+                break
+            if wait > 0:
+                sleep(min(wait, 60.0))  # wake up regularly so Ctrl-C stays responsive
+                continue
+            heapq.heappop(self.queue)
+            checked.add(key)
+            next_due, used = self.check(key)
+            heapq.heappush(self.queue, (next_due, key))
+            if used:
+                sleep(self.interval * used)
+
+    def summary(self):
+        stalest = min((v.get("verified_at_ts") or 0 for v in self.state.values()), default=0)
+        age = f"{(time.time() - stalest) / 3600.0:.1f} h" if stalest else "never"
+        return (f"[DRIFT] {self.checks} checks, {self.stats.requests} HTTP requests, {self.alerts} alerts; "
+                f"{len(self.rows)} rows, stalest verification {age}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Continuously re-verify cloud region -> WattTime region assignments.")
+    ap.add_argument("--cloud", default="azure,aws,gcp", help="Comma-separated clouds (default: azure,aws,gcp)")
+    ap.add_argument("--rows-dir", default=DEFAULT_ROWS_DIR, help="Directory holding <cloud>.csv/.json/.yaml")
+    ap.add_argument("--rows", action="append", default=[], metavar="CLOUD=PATH",
+                    help="Row table for one cloud (overrides --rows-dir; repeatable)")
+    ap.add_argument("--signal", default="co2_moer", help="WattTime signal_type (default: co2_moer)")
+    ap.add_argument("--budget-per-hour", type=float, default=60.0, help="HTTP requests allowed per hour (default: 60)")
+    ap.add_argument("--min-age", type=float, default=86400.0,
+                    help="Seconds before a verified row is due again (default: 86400)")
+    ap.add_argument("--retry-delay", type=float, default=900.0, help="Seconds before a failed check is retried")
+    ap.add_argument("--retries", type=int, default=3, help="Retries per API call")
+    ap.add_argument("--timeout", type=float, default=20.0, help="HTTP timeout seconds")
+    ap.add_argument("--state", default=DEFAULT_DRIFT_STATE, help="Verification state file")
+    ap.add_argument("--alerts", default=DEFAULT_ALERTS, help="Append JSON-line alerts here")
+    ap.add_argument("--static-map", default=DEFAULT_STATIC_MAP, help="StaticRegionMapper.cs to compare against ('' to skip)")
+    ap.add_argument("--once", action="store_true", help="Check every row that is due, then exit")
+    args = ap.parse_args(argv)
+
+    monitor = DriftMonitor(load_clouds(args), TokenManager.from_env(), state_path=args.state,
+                           alerts_path=args.alerts, static_map=args.static_map, signal=args.signal,
+                           budget_per_hour=args.budget_per_hour, min_age=args.min_age,
+                           retry_delay=args.retry_delay, timeout=args.timeout, retries=args.retries)
+    print(f"[INFO] {len(monitor.rows)} rows, {sum(1 for due, _ in monitor.queue if due <= time.time())} due now; "
+          f"one request every {monitor.interval:.1f}s")
+    try:
+        monitor.run(once=args.once)
+    except KeyboardInterrupt:
+        print("[INFO] interrupted")
+    except CredentialsError as e:
+        raise SystemExit(str(e))
+    finally:
+        print(monitor.summary())
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
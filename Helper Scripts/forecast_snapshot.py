@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Forecast warm-up snapshot: /v3/forecast for every resolved WattTime region, in one file.
+
+Usage:
+  python forecast_snapshot.py OUT_DIR PJM_DC CAISO_NORTH [...] [--signal co2_moer] [--horizon 24]
+  python resolve.py ... --forecast-snapshot OUT_DIR [--forecast-horizon 24]
+
+Notes:
+- Every unique abbrev is fetched once per signal, concurrently (bounded by --concurrency)
+  over the resolver's session and rate limiter, with the same retry policy as lookups.
+- The snapshot is compact JSON written atomically to OUT_DIR/forecast_<UTC timestamp>.json,
+  so the newest file sorts last:
+    {"version": 1, "generated_at": ..., "horizon_hours": 24,
+     "signals": {signal: {abbrev: {"generated_at", "units", "start", "period_s", "values"}}},
+     "failed": {signal: {abbrev: error}}}
+  Point i of a forecast starts at start + i * period_s; forecasts that are not evenly
+  spaced keep explicit "points": [[point_time, value], ...] instead.
+- A service can load the newest snapshot at startup to prime its forecast cache (e.g.
+  WattTimeProvider) and only call WattTime once an entry is older than it tolerates.
+- Plans without forecast access answer 403; those regions land in "failed" instead of
+  failing the run. So do regions not fetched by resolve.py's --deadline; the snapshot
+  is then written with whatever arrived in time.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import add_metrics_args, instrumented_run
+from watttime_auth import API_BASE, CredentialsError, TokenManager
+from watttime_resolver import (api_get, make_session, DaemonExecutor, DeadlineExceeded, ResolveStats,
+                               AdaptiveRateLimiter)
+
+
+FORECAST_URL = f"{API_BASE}/v3/forecast"
+SNAPSHOT_VERSION = 1
+
+
+def fetch_forecast(token, region, signal="co2_moer", horizon_hours=24, **kwargs):
+    """Raw /v3/forecast payload for one region (api_get keyword arguments pass through)."""
+    return api_get(FORECAST_URL, token, {"region": region, "signal_type": signal, "horizon_hours": horizon_hours},
+                   span="forecast_attempt", **kwargs)
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def compact_forecast(payload):
+    """{"generated_at", "units", "start", "period_s", "values"} (or "points") from a v3 payload."""
+    meta = payload.get("meta") or {}
+    data = [p for p in payload.get("data") or [] if "point_time" in p and p.get("value") is not None]
+    out = {"generated_at": meta.get("generated_at"), "units": meta.get("units")}
+    if not data:
+        out["values"] = []
+        return out
+    times = [_parse_time(p["point_time"]) for p in data]
+    period = times[1] - times[0] if len(times) > 1 else float(meta.get("data_point_period_seconds") or 300)
+    if period > 0 and all(abs(b - a - period) < 1e-6 for a, b in zip(times, times[1:])):
+        out.update(start=data[0]["point_time"], period_s=int(period), values=[p["value"] for p in data])
+    else:
+        out["points"] = [[p["point_time"], p["value"]] for p in data]
+    return out
+
+
+async def fetch_forecasts_async(regions, token, signal="co2_moer", horizon_hours=24, concurrency=8, timeout=20.0,
+                                retries=3, session=None, stats=None, limiter=None, breaker=None, deadline=None):
+    """
+    {abbrev: (compact_forecast, error)} for every region, at most `concurrency` in flight.
+    With a `deadline` (time.monotonic() value), regions not fetched by then get DeadlineExceeded.
+    """
+    concurrency = max(1, concurrency)
+    session = session or make_session(concurrency)
+    loop = asyncio.get_running_loop()
+    gate = asyncio.Semaphore(concurrency)
+    pool = ThreadPoolExecutor(max_workers=concurrency) if deadline is None else DaemonExecutor()
+
+    async def fetch(region):
+        async with gate:
+            try:
+                payload = await loop.run_in_executor(
+                    pool,
+                    lambda: fetch_forecast(token, region, signal=signal, horizon_hours=horizon_hours,
+                                           timeout=timeout, retries=retries, session=session, stats=stats,
+                                           limiter=limiter, breaker=breaker, deadline=deadline))
+                print(f"[OK] forecast {region:>22} [{signal}]")
+                return compact_forecast(payload), None
+            except CredentialsError:
+                raise
+            except Exception as e:
+                print(f"[WARN] forecast {region:>22} [{signal}] failed: {e}")
+                return None, e
+
+    tasks = {r: asyncio.ensure_future(fetch(r)) for r in regions}
+    try:
+        if tasks:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            await asyncio.wait(tasks.values(), timeout=left, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for t in tasks.values():
+            t.cancel()
+        # at the deadline, abandon in-flight forecasts (their sends are timed out at it anyway)
+        pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+    results, cut_off = {}, 0
+    for region, t in tasks.items():
+        if t.done() and not t.cancelled():
+            results[region] = t.result()
+        else:
+            cut_off += 1
+            results[region] = (None, DeadlineExceeded("deadline reached before this forecast finished"))
+    if cut_off:
+        print(f"[DEADLINE] deadline reached, {cut_off} forecasts [{signal}] abandoned")
+        sys.stdout.flush()
+    return results
+
+
+def usable_abbrevs(mapping_values):
+    """Sorted unique abbrevs worth a forecast call (no blanks/UNKNOWN)."""
+    return sorted({a for a in mapping_values if a and a != "UNKNOWN"})
+
+def build_snapshot(results_by_signal, horizon_hours):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "horizon_hours": horizon_hours,
+        "signals": {sig: {r: fc for r, (fc, err) in results.items() if err is None}
+                    for sig, results in results_by_signal.items()},
+        "failed": {sig: {r: str(err) for r, (fc, err) in results.items() if err is not None}
+                   for sig, results in results_by_signal.items()},
+    }
+
+def write_snapshot(snapshot, out_dir):
+    """Write `snapshot` atomically to out_dir/forecast_<timestamp>.json and return the path."""
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = snapshot["generated_at"].replace("-", "").replace(":", "")
+    path = os.path.join(out_dir, f"forecast_{stamp}.json")
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".forecast.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+def warm_forecasts(abbrevs_by_signal, token, out_dir, horizon_hours=24, concurrency=8, timeout=20.0, retries=3,
+                   session=None, limiter=None, breaker=None, deadline=None):
+    """
+    Fetch forecasts for {signal: abbrevs} and write one snapshot; returns its path. Regions
+    still unfetched at `deadline` land in "failed" and the partial snapshot is written.
+    """
+    stats = ResolveStats()
+    limiter = limiter or AdaptiveRateLimiter()
+
+    async def fetch_all():
+        return {sig: await fetch_forecasts_async(usable_abbrevs(abbrevs), token, sig, horizon_hours, concurrency,
+                                                 timeout, retries, session, stats, limiter, breaker, deadline)
+                for sig, abbrevs in abbrevs_by_signal.items()}
+
+    snapshot = build_snapshot(asyncio.run(fetch_all()), horizon_hours)
+    path = write_snapshot(snapshot, out_dir)
+    ok = sum(len(v) for v in snapshot["signals"].values())
+    failed = sum(len(v) for v in snapshot["failed"].values())
+    print(f"[FORECAST] {ok} forecasts, {failed} failed, {stats.requests} HTTP requests -> {path}")
+    return path
+
+
+def add_forecast_args(ap):
+    ap.add_argument("--forecast-snapshot", default=None, metavar="DIR",
+                    help="Also fetch /v3/forecast for every resolved abbrev and write a snapshot into DIR")
+    ap.add_argument("--forecast-horizon", type=int, default=24, help="horizon_hours for the snapshot (default: 24)")
+    return ap
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Write a WattTime forecast warm-up snapshot for the given regions.")
+    ap.add_argument("out_dir", help="Directory for forecast_<timestamp>.json")
+    ap.add_argument("regions", nargs="+", help="WattTime region abbrevs (e.g. PJM_DC)")
+    ap.add_argument("--signal", default="co2_moer", help="WattTime signal_type (default: co2_moer)")
+    ap.add_argument("--horizon", type=int, default=24, help="horizon_hours (default: 24)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Max forecasts in flight (default: 8)")
+    ap.add_argument("--rate", type=float, default=4.0, help="Initial request rate, req/s (ramps up until 429)")
+    ap.add_argument("--max-rate", type=float, default=50.0, help="Request rate ceiling, req/s")
+    ap.add_argument("--retries", type=int, default=3, help="Retries per API call")
+    ap.add_argument("--timeout", type=float, default=20.0, help="HTTP timeout seconds")
+    add_metrics_args(ap)
+    args = ap.parse_args(argv)
+    with instrumented_run(args):
+        try:
+            warm_forecasts({args.signal: args.regions}, TokenManager.from_env(), args.out_dir,
+                           horizon_hours=args.horizon, concurrency=args.concurrency, timeout=args.timeout,
+                           retries=args.retries, session=make_session(args.concurrency),
+                           limiter=AdaptiveRateLimiter(rate=args.rate, max_rate=args.max_rate))
+        except CredentialsError as e:
+            raise SystemExit(str(e))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Hedged requests: when an HTTP call is slower than the observed tail, send a duplicate
+and take whichever answers first.
+
+Notes:
+- The hedge delay is the `percentile` of the most recent `window` request latencies
+  (never below `min_delay`); nothing is hedged until `min_samples` latencies are known.
+- At most `max_fraction` of all calls are hedged, so API load grows by that much at worst.
+- Every call's own latency is observed when it finishes, slow losers included, so the
+  threshold tracks the real distribution rather than the hedged-down one.
+- A losing request cannot be cancelled (requests is blocking); it runs to completion or
+  its timeout in the background and its answer is dropped.
+- Thread-safe: call() is used from the resolver's worker threads.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import METRICS
+
+
+class HedgePolicy:
+    def __init__(self, percentile=95.0, max_fraction=0.05, min_samples=20, min_delay=0.01, window=1000,
+                 workers=32):
+        self.percentile = percentile
+        self.max_fraction = max_fraction
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(2, workers), thread_name_prefix="hedge")
+
+    def observe(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def threshold(self):
+        """Current hedge delay in seconds, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        rank = min(len(ordered) - 1, int(self.percentile / 100.0 * len(ordered)))
+        return max(self.min_delay, ordered[rank])
+
+    def _allow(self):
+        with self._lock:
+            if self.hedged + 1 > self.max_fraction * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    def _timed(self, fn):
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def call(self, fn, before_hedge=None):
+        """
+        fn() with at most one hedge. before_hedge() runs right before the duplicate is sent
+        (e.g. to take a rate-limiter token). Returns the first successful result; raises the
+        primary's exception only if every attempt failed.
+        """
+        with self._lock:
+            self.calls += 1
+        delay = self.threshold()
+        primary = self._pool.submit(self._timed, fn)
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow():
+            return primary.result()
+
+        if before_hedge is not None:
+            before_hedge()
+        METRICS.incr("hedged_requests_total")
+        hedge = self._pool.submit(self._timed, fn)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                        METRICS.incr("hedge_wins_total")
+                    return fut.result()
+        return primary.result()
+
+    def summary(self):
+        delay = self.threshold()
+        rate = 100.0 * self.hedged / self.calls if self.calls else 0.0
+        current = f"{delay * 1000.0:.0f} ms" if delay is not None else "not yet known"
+        return (f"[HEDGE] {self.hedged} of {self.calls} requests hedged ({rate:.1f}%), {self.hedge_wins} hedges "
+                f"answered first; p{self.percentile:g} threshold {current}")
+
+    def close(self):
+        self._pool.shutdown(wait=False)
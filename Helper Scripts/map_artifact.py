@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Compact binary (cloud, region) -> WattTime abbrev artifact that services memory-map at
+startup instead of parsing JSON or rebuilding StaticRegionMapper.cs.
+
+Usage:
+  python resolve.py ... --artifact region_map.wtmap
+  python map_artifact.py build region_map.wtmap [--static-map StaticRegionMapper.cs] [--state region_map_state.json]
+  python map_artifact.py verify region_map.wtmap
+  python map_artifact.py get region_map.wtmap azure eastus
+  python map_artifact.py dump region_map.wtmap
+
+Notes:
+- Layout (little-endian), version 1:
+    header   48 bytes  magic "WTREGMAP", version u16, flags u16, count u32, record_size u32,
+                       strings_size u32, generated_at i64 (unix s), signal_off u32,
+                       signal_len u16, crc32 u32 of everything after the header
+    records  count x 40 bytes, sorted by key: key_off u32, abbrev_off u32, key_len u16,
+             abbrev_len u16, lat f64, lon f64, resolved_at i64 (unix s, 0 = unknown)
+    strings  UTF-8 pool; a key is "cloud\\0region" lowercased (StaticRegionMapper compares
+             OrdinalIgnoreCase), abbrevs are stored once however many rows share them
+- Readers binary-search the records in place through mmap; nothing is parsed up front, so
+  opening is a stat, an mmap and a 48-byte header read (plus one CRC pass when verifying).
+- Coordinates are NaN when unknown (entries taken from the .cs file without a state record).
+- write_artifact() replaces the file atomically, so a reader can hot-swap with refresh()
+  while older mappings stay valid for as long as they are open.
+"""
+
+import os
+import sys
+import math
+import mmap
+import time
+import zlib
+import json
+import struct
+import calendar
+import argparse
+import tempfile
+
+from static_map import DEFAULT_STATE_PATH, DEFAULT_STATIC_MAP, load_state, parse_static_map, read_static_map
+
+
+MAGIC = b"WTREGMAP"
+ARTIFACT_VERSION = 1
+HEADER = struct.Struct("<8sHHIIIqIH2xI4x")
+RECORD = struct.Struct("<IIHHddq4x")
+
+
+class ArtifactError(ValueError):
+    """The file is not a readable mapping artifact (bad magic, version, size or checksum)."""
+
+
+def artifact_key(cloud, region):
+    return f"{cloud}\0{region}".lower().encode("utf-8")
+
+
+def write_artifact(entries, path, signal="co2_moer", generated_at=None):
+    """
+    Write [{"cloud", "region", "abbrev", "lat", "lon", "resolved_at"}, ...] to `path`
+    atomically. resolved_at is unix seconds (None/0 if unknown); entries without an abbrev
+    are skipped; a later entry for the same key wins. Returns the number of records.
+    """
+    by_key = {}
+    for e in entries:
+        if e.get("abbrev") and e["abbrev"] != "UNKNOWN":
+            by_key[artifact_key(e["cloud"], e["region"])] = e
+
+    pool = bytearray()
+    offsets = {}
+
+    def intern(raw):
+        if raw not in offsets:
+            offsets[raw] = len(pool)
+            pool.extend(raw)
+        return offsets[raw], len(raw)
+
+    signal_off, signal_len = intern(signal.encode("utf-8"))
+    records = bytearray()
+    for key in sorted(by_key):
+        e = by_key[key]
+        key_off, key_len = intern(key)
+        abbrev_off, abbrev_len = intern(e["abbrev"].encode("utf-8"))
+        lat = math.nan if e.get("lat") is None else float(e["lat"])
+        lon = math.nan if e.get("lon") is None else float(e["lon"])
+        records += RECORD.pack(key_off, abbrev_off, key_len, abbrev_len, lat, lon, int(e.get("resolved_at") or 0))
+
+    body = bytes(records) + bytes(pool)
+    header = HEADER.pack(MAGIC, ARTIFACT_VERSION, 0, len(by_key), RECORD.size, len(pool),
+                         int(time.time() if generated_at is None else generated_at), signal_off, signal_len,
+                         zlib.crc32(body))
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=".wtmap.", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(header)
+        f.write(body)
+    os.chmod(tmp, 0o644)  # mkstemp creates 0600; services reading the map run as other users
+    os.replace(tmp, path)
+    return len(by_key)
+
+
+class MappingArtifact:
+    def __init__(self, path, verify=True):
+        """Memory-map `path`; verify=True also checks the CRC (one pass over the file)."""
+        self.path = path
+        self._open(verify)
+
+    def _open(self, verify):
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if st.st_size < HEADER.size:
+                raise ArtifactError(f"{self.path}: too short for a mapping artifact")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _flags, count, record_size, strings_size, generated_at, signal_off, signal_len,
+         crc) = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            mm.close()
+            raise ArtifactError(f"{self.path}: not a mapping artifact")
+        if version != ARTIFACT_VERSION or record_size != RECORD.size:
+            mm.close()
+            raise ArtifactError(f"{self.path}: unsupported version {version} (record size {record_size})")
+        if HEADER.size + count * record_size + strings_size != st.st_size:
+            mm.close()
+            raise ArtifactError(f"{self.path}: size does not match header (truncated?)")
+        self._mm = mm
+        self._stat = (st.st_ino, st.st_size, st.st_mtime_ns)
+        self._strings = HEADER.size + count * record_size
+        self.count = count
+        self.crc = crc
+        self.generated_at = generated_at
+        self.signal = self._str(signal_off, signal_len)
+        if verify and not self.checksum_ok():
+            self.close()
+            raise ArtifactError(f"{self.path}: checksum mismatch")
+
+    def _str(self, off, length):
+        start = self._strings + off
+        return self._mm[start:start + length].decode("utf-8")
+
+    def checksum_ok(self):
+        return zlib.crc32(memoryview(self._mm)[HEADER.size:]) == self.crc
+
+    def _record(self, i):
+        key_off, abbrev_off, key_len, abbrev_len, lat, lon, resolved_at = RECORD.unpack_from(
+            self._mm, HEADER.size + i * RECORD.size)
+        cloud, _, region = self._str(key_off, key_len).partition("\0")
+        return {"cloud": cloud, "region": region, "abbrev": self._str(abbrev_off, abbrev_len),
+                "lat": None if math.isnan(lat) else lat, "lon": None if math.isnan(lon) else lon,
+                "resolved_at": resolved_at or None}
+
+    def _find(self, cloud, region):
+        key = artifact_key(cloud, region)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, _, key_len = RECORD.unpack_from(self._mm, HEADER.size + mid * RECORD.size)[:3]
+            start = self._strings + key_off
+            probe = self._mm[start:start + key_len]
+            if probe == key:
+                return mid
+            if probe < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, cloud, region, default=None):
+        """Abbrev for (cloud, region), case-insensitive, or `default`."""
+        i = self._find(cloud, region)
+        if i is None:
+            return default
+        _, abbrev_off, _, abbrev_len = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)[:4]
+        return self._str(abbrev_off, abbrev_len)
+
+    def entry(self, cloud, region):
+        """Full record dict for (cloud, region), or None."""
+        i = self._find(cloud, region)
+        return None if i is None else self._record(i)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return (self._record(i) for i in range(self.count))
+
+    def as_mapping(self):
+        """{cloud: {region: abbrev}}, like resolve.py's combined mapping."""
+        out = {}
+        for e in self:
+            out.setdefault(e["cloud"], {})[e["region"]] = e["abbrev"]
+        return out
+
+    def refresh(self, verify=True):
+        """Re-open the file if it was replaced since it was mapped; returns True if it was."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if (st.st_ino, st.st_size, st.st_mtime_ns) == self._stat:
+            return False
+        old = self._mm
+        self._open(verify)
+        old.close()
+        return True
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def entries_from_results(results, resolved_at=None, fallback=None, cache=None, signal="co2_moer"):
+    """
+    Artifact entries from resolve.py's {cloud: (updated_rows, mapping)}, stamped with the
+    time WattTime gave each answer. That comes from the LastKnownGood (rows that only kept
+    their seed carry none), else from the RegionCache, else is `resolved_at` (default now).
+    """
+    now = time.time() if resolved_at is None else resolved_at
+    entries = []
+    for cloud, (updated_rows, _mapping) in results.items():
+        for tup in updated_rows:
+            if fallback is not None:
+                age = fallback.age(tup[5], tup[6], signal)
+            else:
+                age = (cache.age(tup[5], tup[6], signal) if cache is not None else None) or 0.0
+            entries.append({"cloud": cloud, "region": tup[0], "abbrev": tup[7], "lat": tup[5], "lon": tup[6],
+                            "resolved_at": None if age is None else now - age})
+    return entries
+
+def entries_from_static_map(text, state):
+    """Artifact entries for every `_map` entry, with coordinates/time from the incremental state file."""
+    entries = []
+    for (cloud, region), e in parse_static_map(text).items():
+        prev = state.get(f"{cloud}/{region}") or {}
+        if prev.get("abbrev") not in (None, e["abbrev"]):
+            prev = {}  # the .cs entry was edited by hand since; its coordinates are unknown
+        resolved_at = prev.get("resolved_at")
+        entries.append({"cloud": e["cloud"], "region": e["region"], "abbrev": e["abbrev"],
+                        "lat": prev.get("lat"), "lon": prev.get("lon"),
+                        "resolved_at": _parse_iso(resolved_at) if resolved_at else None})
+    return entries
+
+def _parse_iso(value):
+    return calendar.timegm(time.strptime(value, "%Y-%m-%dT%H:%M:%SZ"))
+
+
+def _iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else "-"
+
+def verify_artifact(path):
+    """Print header facts and timings; returns 0 if the artifact is intact, 1 otherwise."""
+    start = time.perf_counter()
+    try:
+        art = MappingArtifact(path, verify=False)
+    except (OSError, ArtifactError) as e:
+        print(f"[FAIL] {e}")
+        return 1
+    opened = time.perf_counter() - start
+    with art:
+        start = time.perf_counter()
+        ok = art.checksum_ok()
+        checked = time.perf_counter() - start
+        print(f"[INFO] {path}: version {ARTIFACT_VERSION}, {len(art)} entries, signal {art.signal}, "
+              f"generated {_iso(art.generated_at)}")
+        if not ok:
+            print("[FAIL] crc32")
+            return 1
+        keys = [(e["cloud"], e["region"]) for e in art]
+        ordered = all(artifact_key(*a) < artifact_key(*b) for a, b in zip(keys, keys[1:]))
+        start = time.perf_counter()
+        found = all(art.get(c, r) is not None for c, r in keys)
+        per_lookup = (time.perf_counter() - start) / max(1, len(keys))
+        print(f"[INFO] opened in {opened * 1e6:.0f} us, crc32 in {checked * 1e6:.0f} us, "
+              f"{per_lookup * 1e6:.1f} us per lookup")
+    for label, good in (("crc32", ok), ("key order", ordered), ("every key found", found)):
+        print(f"[{'OK' if good else 'FAIL'}] {label}")
+    return 0 if ok and ordered and found else 1
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build, verify and inspect binary region-mapping artifacts.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build an artifact from StaticRegionMapper.cs (+ incremental state)")
+    build.add_argument("path")
+    build.add_argument("--static-map", default=DEFAULT_STATIC_MAP, help="Path to StaticRegionMapper.cs")
+    build.add_argument("--state", default=DEFAULT_STATE_PATH, help="region_map_state.json with coordinates")
+    build.add_argument("--signal", default="co2_moer", help="signal_type recorded in the header")
+    sub.add_parser("verify", help="Check magic, version, size, checksum and key order").add_argument("path")
+    get = sub.add_parser("get", help="Look up one (cloud, region)")
+    get.add_argument("path")
+    get.add_argument("cloud")
+    get.add_argument("region")
+    sub.add_parser("dump", help="Print every entry as JSON lines").add_argument("path")
+    args = ap.parse_args(argv)
+
+    if args.command == "build":
+        entries = entries_from_static_map(read_static_map(args.static_map), load_state(args.state))
+        n = write_artifact(entries, args.path, signal=args.signal)
+        print(f"[OK] {n} entries -> {args.path} ({os.path.getsize(args.path)} bytes)")
+        return 0
+    if args.command == "verify":
+        return verify_artifact(args.path)
+    try:
+        art = MappingArtifact(args.path)
+    except (OSError, ArtifactError) as e:
+        print(f"[FAIL] {e}")
+        return 1
+    with art:
+        if args.command == "get":
+            entry = art.entry(args.cloud, args.region)
+            if entry is None:
+                print(f"[WARN] ({args.cloud}, {args.region}) not in {args.path}")
+                return 1
+            print(f"{entry['abbrev']}  ({entry['lat']}, {entry['lon']}) resolved {_iso(entry['resolved_at'])}")
+            return 0
+        for entry in art:
+            print(json.dumps(entry, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Timing spans and counters for resolver runs, exported as JSON and Prometheus text.
+
+Notes:
+- METRICS is a process-wide, thread-safe registry; the resolver, token manager and rate
+  limiter record into it, so nothing has to be threaded through call signatures.
+- span(name) times a block; timings keep count/sum/max plus a bounded reservoir sample
+  for p50/p90/p99, so memory stays flat on long runs.
+- --profile writes a cProfile dump of the main thread (event loop, planning, fan-out);
+  the HTTP worker threads show up in the spans instead.
+"""
+
+import json
+import time
+import random
+import threading
+import contextlib
+
+
+PREFIX = "watttime_resolver"
+_RESERVOIR = 10000
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self.counters = {}  # (name, ((label, value), ...)) -> float
+        self.timings = {}   # name -> {"count", "sum", "max", "samples"}
+
+    def incr(self, name, value=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            t = self.timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0, "samples": []})
+            t["count"] += 1
+            t["sum"] += seconds
+            t["max"] = max(t["max"], seconds)
+            if len(t["samples"]) < _RESERVOIR:
+                t["samples"].append(seconds)
+            else:
+                slot = self._rng.randrange(t["count"])
+                if slot < _RESERVOIR:
+                    t["samples"][slot] = seconds
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.timings.clear()
+
+    @staticmethod
+    def _quantile(samples, q):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self):
+        with self._lock:
+            counters = {_series(name, labels): value for (name, labels), value in sorted(self.counters.items())}
+            timings = {
+                name: {"count": t["count"], "sum_s": round(t["sum"], 6),
+                       "avg_ms": round(t["sum"] / t["count"] * 1000.0, 3) if t["count"] else None,
+                       "p50_ms": _ms(self._quantile(t["samples"], 0.5)),
+                       "p90_ms": _ms(self._quantile(t["samples"], 0.9)),
+                       "p99_ms": _ms(self._quantile(t["samples"], 0.99)),
+                       "max_ms": _ms(t["max"])}
+                for name, t in sorted(self.timings.items())}
+        return {"counters": counters, "timings": timings}
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{PREFIX}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} counter")
+                    seen.add(metric)
+                lines.append(f"{_series(metric, labels)} {value:g}")
+            for name, t in sorted(self.timings.items()):
+                metric = f"{PREFIX}_{name}_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for q in (0.5, 0.9, 0.99):
+                    v = self._quantile(t["samples"], q)
+                    if v is not None:
+                        lines.append(f'{metric}{{quantile="{q}"}} {v:.6f}')
+                lines.append(f"{metric}_sum {t['sum']:.6f}")
+                lines.append(f"{metric}_count {t['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 3)
+
+
+METRICS = Metrics()
+
+
+def add_metrics_args(ap):
+    ap.add_argument("--metrics-json", default=None, help="Write timing spans and counters as JSON here")
+    ap.add_argument("--metrics-prom", default=None, help="Write the same metrics in Prometheus text format here")
+    ap.add_argument("--profile", default=None, help="Write a cProfile dump (main thread) here")
+    return ap
+
+@contextlib.contextmanager
+def instrumented_run(args, metrics=METRICS):
+    """Wrap a CLI run: optional cProfile, then write the metrics files when it ends."""
+    profiler = None
+    if getattr(args, "profile", None):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with metrics.span("run"):
+            yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"[INFO] cProfile dump -> {args.profile}")
+        if getattr(args, "metrics_json", None):
+            with open(args.metrics_json, "w", encoding="utf-8") as f:
+                json.dump(metrics.to_dict(), f, indent=2)
+                f.write("\n")
+            print(f"[INFO] metrics (JSON) -> {args.metrics_json}")
+        if getattr(args, "metrics_prom", None):
+            with open(args.metrics_prom, "w", encoding="utf-8") as f:
+                f.write(metrics.to_prometheus())
+            print(f"[INFO] metrics (Prometheus) -> {args.metrics_prom}")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the WattTime endpoints the helper scripts use, for benchmarks and
+offline runs (no network, no quota).
+
+Usage:
+  python mock_watttime.py [--port 8099] [--latency lognormal:20:0.5] [--p429 0.02] [--p5xx 0.01]
+                          [--token-ttl 1800]
+  WATTTIME_API_BASE=http://127.0.0.1:8099 WATTTIME_USER=x WATTTIME_PASSWORD=x python resolve.py --no-cache
+
+Notes:
+- GET /login (any basic-auth credentials) -> {"token": ...}; tokens expire after --token-ttl
+  seconds and are then answered with 401.
+- GET /v3/region-from-loc -> {"region": "MOCK_<lat/5>_<lon/5>", "signal_type": ...}, i.e. a
+  deterministic 5-degree grid of fake balancing authorities.
+- GET /v3/forecast -> {"data": [{"point_time", "value"}, ...], "meta": {...}}: a daily sine
+  wave in 5-minute points for horizon_hours (capped at 72), phase-shifted per region.
+- --latency is fixed:MS, uniform:LO:HI or lognormal:MEDIAN:SIGMA (milliseconds).
+- --p429 / --p5xx inject errors with that probability (429 carries Retry-After: --retry-after).
+- `counters` tracks logins, requests and every injected error for the benchmark report.
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import secrets
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+def parse_latency(spec):
+    """'fixed:20' | 'uniform:10:50' | 'lognormal:20:0.5' -> callable(rng) returning seconds."""
+    kind, _, rest = (spec or "fixed:0").partition(":")
+    args = [float(v) for v in rest.split(":") if v]
+    if kind == "fixed":
+        return lambda rng: args[0] / 1000.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000.0
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1]) / 1000.0
+    raise ValueError(f"unknown latency distribution {spec!r}")
+
+def mock_region(lat, lon):
+    return f"MOCK_{math.floor(lat / 5)}_{math.floor(lon / 5)}".replace("-", "M")
+
+
+def mock_forecast(region, signal, horizon_hours, now=None):
+    """v3/forecast-shaped payload: 5-minute points from the current 5-minute boundary."""
+    start = int((now or time.time()) // 300 * 300)
+    phase = sum(map(ord, region)) % 288
+    data = [{"point_time": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(start + 300 * i)),
+             "value": round(500 + 200 * math.sin(2 * math.pi * (phase + i) / 288), 1)}
+            for i in range(horizon_hours * 12)]
+    meta = {"region": region, "signal_type": signal, "units": "lbs_co2_per_mwh", "data_point_period_seconds": 300,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(start))}
+    return {"data": data, "meta": meta}
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients that give up mid-response (deadlines, hedged losers) are expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockWattTime:
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0", p429=0.0, p5xx=0.0,
+                 retry_after=1.0, token_ttl=1800.0, seed=1):
+        self.latency = parse_latency(latency)
+        self.p429 = p429
+        self.p5xx = p5xx
+        self.retry_after = retry_after
+        self.token_ttl = token_ttl
+        self.counters = {"login": 0, "region_from_loc": 0, "forecast": 0, "ok": 0, "429": 0, "5xx": 0, "401": 0}
+        self._tokens = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _QuietServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _draw(self):
+        with self._lock:
+            return self.latency(self._rng), self._rng.random()
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True  # headers and body are separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _forecast(self, q):
+                region = q.get("region", [""])[0]
+                if not region:
+                    return self._send(400, {"error": "region required"})
+                signal = q.get("signal_type", ["co2_moer"])[0]
+                horizon = min(72, max(1, int(float(q.get("horizon_hours", ["24"])[0]))))
+                mock._count("ok")
+                self._send(200, mock_forecast(region, signal, horizon))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                delay, roll = mock._draw()
+                if url.path == "/login":
+                    mock._count("login")
+                    time.sleep(delay)
+                    token = secrets.token_hex(16)
+                    with mock._lock:
+                        mock._tokens[token] = time.time() + mock.token_ttl
+                    return self._send(200, {"token": token})
+                if url.path in ("/v3/region-from-loc", "/v3/forecast"):
+                    mock._count(url.path.rsplit("/", 1)[-1].replace("-", "_"))
+                    time.sleep(delay)
+                    token = (self.headers.get("Authorization") or "").removeprefix("Bearer ")
+                    with mock._lock:
+                        expires = mock._tokens.get(token, 0)
+                    if expires < time.time():
+                        mock._count("401")
+                        return self._send(401, {"error": "token expired or invalid"})
+                    if roll < mock.p429:
+                        mock._count("429")
+                        return self._send(429, {"error": "rate limited"},
+                                          {"Retry-After": f"{mock.retry_after:g}"})
+                    if roll < mock.p429 + mock.p5xx:
+                        mock._count("5xx")
+                        return self._send(503, {"error": "injected failure"})
+                    q = parse_qs(url.query)
+                    if url.path == "/v3/forecast":
+                        return self._forecast(q)
+                    try:
+                        lat, lon = float(q["latitude"][0]), float(q["longitude"][0])
+                    except (KeyError, ValueError):
+                        return self._send(400, {"error": "latitude/longitude required"})
+                    signal = q.get("signal_type", ["co2_moer"])[0]
+                    mock._count("ok")
+                    abbrev = mock_region(lat, lon)
+                    return self._send(200, {"region": abbrev, "region_full_name": abbrev, "signal_type": signal})
+                self._send(404, {"error": "not found"})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def add_mock_args(ap):
+    ap.add_argument("--latency", default="lognormal:20:0.5", help="fixed:MS | uniform:LO:HI | lognormal:MEDIAN:SIGMA")
+    ap.add_argument("--p429", type=float, default=0.0, help="Probability of an injected 429")
+    ap.add_argument("--p5xx", type=float, default=0.0, help="Probability of an injected 503")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    ap.add_argument("--token-ttl", type=float, default=1800.0, help="Seconds before issued tokens expire")
+    ap.add_argument("--seed", type=int, default=1, help="RNG seed for latency/error injection")
+    return ap
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock WattTime API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8099)
+    add_mock_args(ap)
+    args = ap.parse_args()
+    mock = MockWattTime(args.host, args.port, latency=args.latency, p429=args.p429, p5xx=args.p5xx,
+                        retry_after=args.retry_after, token_ttl=args.token_ttl, seed=args.seed).start()
+    print(f"[INFO] mock WattTime listening on {mock.base_url} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+        print(json.dumps(mock.counters))
+        sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON output with a resumable checkpoint file.
+
+Notes:
+- One JSON object per resolved row, written and flushed as soon as the row completes, so
+  other tools can tail the file while a run is in progress.
+- Successfully resolved rows are appended to the checkpoint (one "cloud<TAB>region<TAB>signal"
+  line each) after their record is flushed; --resume skips those rows and appends to the
+  existing output. Failed rows are not checkpointed, so a resumed run retries them.
+- A crash between the record and its checkpoint line can repeat that one row on resume
+  (at-least-once); consumers should key on (cloud, region, signal). With several signals,
+  a row that is only partly checkpointed is re-resolved for all of them.
+- Rows answered from the last-known-good snapshot are written with status "stale" and
+  are not checkpointed either, so a resumed run tries them live again.
+"""
+
+import os
+import json
+import time
+
+from circuit_breaker import StaleAnswer
+
+
+def record_status(error):
+    if error is None:
+        return "ok"
+    return "stale" if isinstance(error, StaleAnswer) else "failed"
+
+def checkpoint_key(cloud, region, signal):
+    return f"{cloud}\t{region}\t{signal}"
+
+
+class NdjsonSink:
+    def __init__(self, path, checkpoint_path=None, signal="co2_moer", resume=False):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+        self.signal = signal
+        self.done = self._load_checkpoint() if resume else set()
+        self.written = 0
+        self.failed = 0
+        mode = "a" if resume else "w"
+        self._out = open(path, mode, encoding="utf-8")
+        self._ckpt = open(self.checkpoint_path, mode, encoding="utf-8")
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            return {line.rstrip("\n") for line in f if line.strip()}
+
+    def is_done(self, cloud, region, signals=None):
+        """True once the row is checkpointed for every one of `signals` (default: the sink's signal)."""
+        return all(checkpoint_key(cloud, region, sig) in self.done for sig in (signals or [self.signal]))
+
+    def __call__(self, cloud, tup, error, signal=None):
+        signal = signal or self.signal
+        (region, display_name, city, country, cc, lat, lon, abbrev) = tup
+        record = {"cloud": cloud, "region": region, "display_name": display_name, "city": city,
+                  "country": country, "cc": cc, "lat": lat, "lon": lon, "signal": signal,
+                  "abbrev": abbrev, "status": record_status(error),
+                  "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        if error is not None:
+            record["error"] = str(error)
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._out.flush()
+        if error is None:
+            self._ckpt.write(checkpoint_key(cloud, region, signal) + "\n")
+            self._ckpt.flush()
+            self.written += 1
+        else:
+            self.failed += 1
+
+    def summary(self):
+        return (f"[NDJSON] {self.written} resolved, {self.failed} failed, {len(self.done)} skipped "
+                f"(already done) -> {self.path}")
+
+    def close(self):
+        self._out.close()
+        self._ckpt.close()
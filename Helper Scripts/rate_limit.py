@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Adaptive (AIMD) token-bucket rate limiter and retry helpers for WattTime calls.
+
+Notes:
+- Starts at `rate` requests/second and ramps up on every success, up to `max_rate`:
+  slow start (doubling about once a second) until the first 429, additive afterwards.
+- A 429 cuts the rate multiplicatively (at most once per second, so a burst of
+  concurrent 429s counts as one signal) and pauses everyone for Retry-After.
+- Thread-safe: acquire() is called from the resolver's worker threads.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+from metrics import METRICS
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """Retry-After header (delta-seconds or HTTP date) -> seconds, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(base, attempt, cap=30.0):
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**(attempt-1)))."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate=4.0, max_rate=50.0, min_rate=0.5, increase=1.0, decrease=0.5, burst=1.0):
+        self.rate = max(min_rate, min(rate, max_rate))
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = max(1.0, burst)
+        self.throttled = 0
+        self.peak_rate = self.rate
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """
+        Block until a request may be sent and return True; with a `deadline`
+        (time.monotonic() value), give up and return False once it passes.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        return True
+                    wait = (1.0 - self._tokens) / self.rate
+            if deadline is not None:
+                if now >= deadline:
+                    return False
+                wait = min(wait, deadline - now)
+            time.sleep(wait)
+
+    def on_success(self):
+        # slow start: +1 per success doubles the rate each second; after the first 429,
+        # +increase/rate per success ~= +increase req/s for every second of full-rate traffic
+        with self._lock:
+            step = 1.0 if not self.throttled else self.increase / self.rate
+            self.rate = min(self.max_rate, self.rate + step)
+            self.peak_rate = max(self.peak_rate, self.rate)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            METRICS.incr("throttled_total")
+            if now - self._last_decrease >= 1.0:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def summary(self):
+        return f"[RATE] ended at {self.rate:.1f} req/s (peak {self.peak_rate:.1f}), {self.throttled} throttled"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for WattTime region-from-loc answers.
+
+Notes:
+- Keyed by (lat, lon rounded to `precision` decimals, signal_type); stores the raw JSON
+  payload so normalize_region_abbrev still decides the abbrev.
+- Entries older than `ttl` seconds are treated as misses and overwritten on the next fetch.
+- Safe to share between the resolver's worker threads.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+CACHE_DIR = os.path.expanduser(os.environ.get("WATTTIME_CACHE_DIR", "~/.cache/watttime"))
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "region_cache.sqlite")
+DEFAULT_TTL = 30 * 24 * 3600  # grid-region boundaries almost never move
+
+
+class RegionCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, precision=4, refresh=False):
+        """refresh=True skips reads (every lookup is a miss) but still writes fresh answers."""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.precision = precision
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS region_cache ("
+            " lat TEXT NOT NULL, lon TEXT NOT NULL, signal TEXT NOT NULL,"
+            " data TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (lat, lon, signal))")
+        self._db.commit()
+
+    def key(self, lat, lon, signal):
+        return (f"{lat:.{self.precision}f}", f"{lon:.{self.precision}f}", signal)
+
+    def get(self, lat, lon, signal):
+        """Cached payload for the point, or None on a miss/expired entry."""
+        row = None
+        if not self.refresh:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT data, fetched_at FROM region_cache WHERE lat=? AND lon=? AND signal=?",
+                    self.key(lat, lon, signal)).fetchone()
+        with self._lock:
+            if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def age(self, lat, lon, signal):
+        """Seconds since the point was last fetched (expired entries included), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at FROM region_cache WHERE lat=? AND lon=? AND signal=?",
+                self.key(lat, lon, signal)).fetchone()
+        return None if row is None else max(0.0, time.time() - row[0])
+
+    def put(self, lat, lon, signal, data):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO region_cache (lat, lon, signal, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (*self.key(lat, lon, signal), json.dumps(data), time.time()))
+            self._db.commit()
+
+    def invalidate(self, lat, lon, signal):
+        with self._lock:
+            self._db.execute("DELETE FROM region_cache WHERE lat=? AND lon=? AND signal=?",
+                             self.key(lat, lon, signal))
+            self._db.commit()
+
+    def purge_expired(self):
+        """Drop entries older than the TTL; returns how many were removed."""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cur = self._db.execute("DELETE FROM region_cache WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self._db.commit()
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM region_cache")
+            self._db.commit()
+
+    def summary(self):
+        return f"cache: {self.hits} hits, {self.misses} misses ({self.path})"
+
+    def close(self):
+        with self._lock:
+            self._db.close()
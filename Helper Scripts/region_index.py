@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Offline WattTime region lookup from the region boundary GeoJSON (/v3/maps).
+
+Usage:
+  python region_index.py maps_co2_moer.geojson 36.6670 -78.3875 [lat lon ...]
+
+Notes:
+- Polygons are bucketed into a uniform lat/lon grid by bounding box; a query only runs
+  point-in-polygon tests against the polygons registered in the point's cell.
+- Point-in-polygon is an even-odd ray cast vectorized with NumPy over points x edges.
+- Lookups return the feature `properties` (e.g. {"region": "PJM_DC", ...}), so callers
+  still go through normalize_region_abbrev like the online path.
+"""
+
+import sys
+import json
+import math
+
+import numpy as np
+
+from watttime_auth import API_BASE
+
+
+MAPS_URL = f"{API_BASE}/v3/maps"
+
+_POINT_CHUNK = 512  # bounds the points x edges scratch arrays
+
+
+def download_region_map(token, path, signal="co2_moer", timeout=60, session=None):
+    """Fetch the region boundary GeoJSON for `signal` once and store it at `path`."""
+    import requests
+    http = session or requests
+    resp = http.get(MAPS_URL, headers={"Authorization": f"Bearer {token}"},
+                    params={"signal_type": signal}, timeout=timeout)
+    resp.raise_for_status()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(resp.text)
+    return path
+
+
+def _points_in_ring(x, y, ring):
+    """Even-odd test of points (x, y) against a closed ring of shape (n, 2)."""
+    xi, yi = ring[:-1, 0], ring[:-1, 1]
+    xj, yj = ring[1:, 0], ring[1:, 1]
+    inside = np.zeros(len(x), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, len(x), _POINT_CHUNK):
+            px = x[start:start + _POINT_CHUNK, None]
+            py = y[start:start + _POINT_CHUNK, None]
+            crosses = (yi > py) != (yj > py)
+            x_at = (xj - xi) * (py - yi) / (yj - yi) + xi
+            hits = np.count_nonzero(crosses & (px < x_at), axis=1)
+            inside[start:start + _POINT_CHUNK] = (hits % 2) == 1
+    return inside
+
+
+class RegionIndex:
+    def __init__(self, feature_collection, cell_size=1.0):
+        self.cell_size = cell_size
+        self.properties = []   # per polygon
+        self.rings = []        # per polygon: [exterior, hole, hole, ...] as (n, 2) lon/lat arrays
+        self.bboxes = []       # per polygon: (min_lon, min_lat, max_lon, max_lat)
+        self.grid = {}         # (cx, cy) -> [polygon ids], smallest bbox first
+
+        for feature in feature_collection.get("features", []):
+            geom = feature.get("geometry") or {}
+            props = feature.get("properties") or {}
+            if geom.get("type") == "Polygon":
+                polygons = [geom["coordinates"]]
+            elif geom.get("type") == "MultiPolygon":
+                polygons = geom["coordinates"]
+            else:
+                continue
+            for poly in polygons:
+                rings = [self._close(np.asarray(r, dtype=float)[:, :2]) for r in poly if len(r) >= 3]
+                if not rings:
+                    continue
+                ext = rings[0]
+                self.properties.append(props)
+                self.rings.append(rings)
+                self.bboxes.append((ext[:, 0].min(), ext[:, 1].min(), ext[:, 0].max(), ext[:, 1].max()))
+
+        def area(pid):
+            b = self.bboxes[pid]
+            return (b[2] - b[0]) * (b[3] - b[1])
+
+        # nested/overlapping regions: the tighter polygon wins
+        for pid in sorted(range(len(self.bboxes)), key=area):
+            min_lon, min_lat, max_lon, max_lat = self.bboxes[pid]
+            for cx in range(self._cell(min_lon), self._cell(max_lon) + 1):
+                for cy in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                    self.grid.setdefault((cx, cy), []).append(pid)
+
+    @classmethod
+    def from_file(cls, path, cell_size=1.0):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), cell_size=cell_size)
+
+    @staticmethod
+    def _close(ring):
+        if not np.array_equal(ring[0], ring[-1]):
+            ring = np.vstack([ring, ring[:1]])
+        return ring
+
+    def _cell(self, v):
+        return int(math.floor(v / self.cell_size))
+
+    def lookup_many(self, lats, lons):
+        """Feature properties for each (lat, lon), or None where no region contains the point."""
+        lat = np.asarray(lats, dtype=float)
+        lon = np.asarray(lons, dtype=float)
+        result = [None] * len(lat)
+        if not len(lat):
+            return result
+        assigned = np.zeros(len(lat), dtype=bool)
+
+        cx = np.floor(lon / self.cell_size).astype(int)
+        cy = np.floor(lat / self.cell_size).astype(int)
+        cells = {}
+        for i, cell in enumerate(zip(cx.tolist(), cy.tolist())):
+            cells.setdefault(cell, []).append(i)
+
+        for cell, members in cells.items():
+            members = np.asarray(members)
+            for pid in self.grid.get(cell, ()):
+                todo = members[~assigned[members]]
+                if not len(todo):
+                    break
+                min_lon, min_lat, max_lon, max_lat = self.bboxes[pid]
+                box = ((lon[todo] >= min_lon) & (lon[todo] <= max_lon)
+                       & (lat[todo] >= min_lat) & (lat[todo] <= max_lat))
+                cand = todo[box]
+                if not len(cand):
+                    continue
+                ext, *holes = self.rings[pid]
+                inside = _points_in_ring(lon[cand], lat[cand], ext)
+                for hole in holes:
+                    if inside.any():
+                        inside &= ~_points_in_ring(lon[cand], lat[cand], hole)
+                for i in cand[inside]:
+                    result[i] = self.properties[pid]
+                assigned[cand[inside]] = True
+        return result
+
+    def lookup(self, lat, lon):
+        return self.lookup_many([lat], [lon])[0]
+
+
+def main():
+    if len(sys.argv) < 4 or len(sys.argv) % 2 != 0:
+        print(__doc__)
+        sys.exit(2)
+    from watttime_resolver import normalize_region_abbrev
+    index = RegionIndex.from_file(sys.argv[1])
+    coords = [float(v) for v in sys.argv[2:]]
+    lats, lons = coords[0::2], coords[1::2]
+    for lat, lon, props in zip(lats, lons, index.lookup_many(lats, lons)):
+        print(f"({lat:.4f}, {lon:.4f}) -> {normalize_region_abbrev(props) if props else 'UNKNOWN'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+In-process WattTime region resolver for schedulers and workers that need an abbrev at
+runtime without shelling out to a helper script.
+
+Usage:
+  from region_resolver import RegionResolver
+
+  resolver = RegionResolver()                      # WATTTIME_USER / WATTTIME_PASSWORD
+  resolver.resolve(45.60, -121.18)                 # -> "BPA"
+  await resolver.resolve_async(60.67, 17.14, signal="co2_moer")
+  resolver.resolve_many([(35.68, 139.69), (35.86, 139.65)])
+
+Notes:
+- Wraps the same login / region_from_loc / normalize_region_abbrev path as the scripts
+  (retries, 401 re-login, rate limiter, optional RegionCache and CircuitBreaker).
+- Answers are kept in a bounded in-memory LRU keyed by (lat, lon rounded to `precision`,
+  signal); entries expire `ttl` seconds after they were fetched. Failures are not cached.
+- Single-flight: concurrent callers asking for the same key, sync or async, wait on one
+  in-flight request instead of each sending their own.
+- Importing this module pulls in the standard library only; requests, the token manager
+  and the resolver are imported on the first lookup that misses the LRU.
+- Thread-safe; async methods run lookups on a small private thread pool.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_LRU_TTL = 24 * 3600
+
+
+class _LRU:
+    """Bounded mapping with per-entry expiry; least recently used entries are evicted first."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RegionResolver:
+    def __init__(self, token=None, signal="co2_moer", maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_LRU_TTL, precision=4,
+                 timeout=20.0, retries=3, workers=8, cache=None, limiter=None, breaker=None):
+        """
+        token: plain bearer string, watttime_auth.TokenManager, or None to log in from the
+        environment on first use. cache / limiter / breaker are the resolver's own RegionCache,
+        AdaptiveRateLimiter and CircuitBreaker (a default limiter is created lazily).
+        """
+        self.signal = signal
+        self.precision = precision
+        self.timeout = timeout
+        self.retries = retries
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.limiter = limiter
+        self.breaker = breaker
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+        self._token = token
+        self._lru = _LRU(maxsize, ttl)
+        self._inflight = {}  # key -> Future shared by every caller waiting on that key
+        self._lock = threading.Lock()
+        self._session = None
+        self._stats = None
+        self._pool = None
+
+    def _http(self):
+        with self._lock:
+            if self._session is None:
+                from watttime_auth import TokenManager
+                from watttime_resolver import make_session, ResolveStats, AdaptiveRateLimiter
+                if self._token is None:
+                    self._token = TokenManager.from_env()
+                if self.limiter is None:
+                    self.limiter = AdaptiveRateLimiter()
+                self._stats = ResolveStats()
+                self._session = make_session(self.workers)
+            return self._session
+
+    def login(self):
+        """A valid bearer token (logs in, or reuses the cached token, as needed)."""
+        self._http()
+        return self._token if isinstance(self._token, str) else self._token.get()
+
+    def _fetch(self, lat, lon, signal):
+        from watttime_resolver import region_from_loc, normalize_region_abbrev
+        session = self._http()
+        data = region_from_loc(self._token, lat, lon, signal=signal, timeout=self.timeout, retries=self.retries,
+                               session=session, cache=self.cache, stats=self._stats, limiter=self.limiter,
+                               breaker=self.breaker)
+        return normalize_region_abbrev(data)
+
+    def key(self, lat, lon, signal=None):
+        return (round(lat, self.precision), round(lon, self.precision), signal or self.signal)
+
+    def _cached(self, key):
+        abbrev = self._lru.get(key)
+        with self._lock:
+            if abbrev is not None:
+                self.hits += 1
+        return abbrev
+
+    def _flight(self, key):
+        """
+        (future, leader): an LRU hit, the lookup already in flight for `key`, or a new one
+        the caller must run. The LRU is checked again under the lock: a leader that finished
+        after the caller's own miss has already stored its answer and left _inflight.
+        """
+        from concurrent.futures import Future
+        with self._lock:
+            abbrev = self._lru.get(key)
+            if abbrev is not None:
+                self.hits += 1
+                fut = Future()
+                fut.set_result(abbrev)
+                return fut, False
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+            self.misses += 1
+            fut = Future()
+            fut.set_running_or_notify_cancel()  # one waiter giving up must not cancel it for the rest
+            self._inflight[key] = fut
+            return fut, True
+
+    def _run(self, key, fut):
+        try:
+            abbrev = self._fetch(*key)
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+                del self._inflight[key]
+            fut.set_exception(e)
+        else:
+            self._lru.put(key, abbrev)
+            with self._lock:
+                del self._inflight[key]
+            fut.set_result(abbrev)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="region-resolver")
+            return self._pool
+
+    def _submit(self, key):
+        """Future for `key`'s abbrev: an LRU hit, the in-flight lookup, or a new one on the pool."""
+        fut, leader = self._flight(key)
+        if leader:
+            self._executor().submit(self._run, key, fut)
+        return fut
+
+    def resolve(self, lat, lon, signal=None):
+        """WattTime abbrev for one point; raises the lookup's error if it failed."""
+        key = self.key(lat, lon, signal)
+        abbrev = self._cached(key)
+        if abbrev is not None:
+            return abbrev
+        fut, leader = self._flight(key)
+        if leader:
+            self._run(key, fut)  # on the caller's thread; followers wait on the future
+        return fut.result()
+
+    async def resolve_async(self, lat, lon, signal=None):
+        """resolve() for asyncio callers; the event loop is never blocked on HTTP."""
+        import asyncio
+        return await asyncio.wrap_future(self._submit(self.key(lat, lon, signal)))
+
+    def resolve_many(self, points, signal=None, return_exceptions=False):
+        """
+        Abbrevs for an iterable of (lat, lon), in input order, looked up concurrently on the
+        pool. Repeated points cost one lookup. With return_exceptions=True a failed point
+        yields its exception instead of raising the first one.
+        """
+        futures = [self._submit(self.key(lat, lon, signal)) for lat, lon in points]
+        return [_outcome(f, return_exceptions) for f in futures]
+
+    async def resolve_many_async(self, points, signal=None, return_exceptions=False):
+        import asyncio
+        futures = [asyncio.wrap_future(self._submit(self.key(lat, lon, signal))) for lat, lon in points]
+        return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+    def invalidate(self, lat=None, lon=None, signal=None):
+        """Drop one point from the LRU, or every point when called without coordinates."""
+        if lat is None or lon is None:
+            self._lru.clear()
+            return
+        self._lru.pop(self.key(lat, lon, signal))
+
+    def summary(self):
+        requests = self._stats.requests if self._stats is not None else 0
+        return (f"[RESOLVER] {self.hits} LRU hits, {self.misses} lookups, {self.coalesced} coalesced, "
+                f"{self.failures} failed, {requests} HTTP requests; {len(self._lru)} points cached")
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            session, self._session = self._session, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if session is not None:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _outcome(fut, return_exceptions):
+    if return_exceptions and fut.exception() is not None:
+        return fut.exception()
+    return fut.result()
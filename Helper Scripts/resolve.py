@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Resolve cloud regions -> WattTime regions for several clouds in one pipeline (prints to stdout only).
+
+Usage:
+  python resolve.py --cloud azure,aws,gcp [--rows-dir rows] [--rows gcp=my_gcp.yaml]
+                    [--signal co2_moer | --signals co2_moer,co2_aoer,health_damage] [--concurrency 8] [--rate 4] [--max-rate 50] [--retries 3]
+                    [--refresh | --no-cache] [--offline [--region-map maps.geojson]] [--hedge]
+                    [--breaker-threshold 5] [--fallback last_known_good.json | --no-fallback]
+                    [--deadline 300 [--max-concurrency 32]]
+                    [--incremental [--emit diff|block] [--write]]
+                    [--ndjson out.ndjson [--checkpoint out.ndjson.checkpoint] [--resume]]
+                    [--metrics-json m.json] [--metrics-prom m.prom] [--profile run.prof]
+                    [--forecast-snapshot DIR [--forecast-horizon 24]] [--artifact region_map.wtmap]
+                    [--samples 7 [--sample-radius-km 25] [--samples-initial 3] [--sample-budget 200]]
+
+Notes:
+- Row tables are loaded from <rows-dir>/<cloud>.csv|.json|.yaml, or --rows cloud=path.
+- All clouds go through one login, session, cache, rate limiter and de-duplication pass,
+  so coordinates shared between clouds are looked up once.
+- Prints per-cloud results plus a combined { cloud: { region: abbrev } } mapping, keyed like
+  the (cloud, region) tuples of StaticRegionMapper.
+- --signals resolves every point for several signal_types in the same concurrent pass and
+  prints a { cloud: { region: { signal: abbrev } } } table (not with --offline/--incremental).
+- --metrics-json / --metrics-prom export per-phase timings and counters at the end of the
+  run (see metrics.py); --profile writes a cProfile dump.
+- --ndjson streams one record per row as it completes instead of printing everything at
+  the end; --resume skips rows recorded in the checkpoint (see ndjson_output.py).
+- --deadline SECONDS bounds the run; rows are resolved most-needed first and the mapping
+  printed at the deadline is partial, with [COVERAGE] stats.
+- When WattTime is down, the circuit breaker short-circuits the remaining rows, which fall
+  back to the last-known-good snapshot instead of the empty seed; a freshness table marks
+  every entry fresh (fetched this run), cached, stale or failed.
+- --forecast-snapshot then fetches /v3/forecast for every unique resolved abbrev (per
+  signal; with --incremental, every abbrev in the updated _map) and writes a timestamped
+  warm-up snapshot (see forecast_snapshot.py).
+- --samples K resolves each row by majority vote over K points within --sample-radius-km,
+  expanding past the first few only where they disagree, under a global --sample-budget
+  of extra lookups; disputed rows are listed with a confidence (see campus_sampling.py).
+- --artifact also writes the mapping as a memory-mappable binary table with coordinates
+  and resolution times (see map_artifact.py); with --incremental it covers the whole
+  `_map`, not just the re-resolved rows.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from campus_sampling import add_campus_args, campus_resolve, print_campus_report
+from forecast_snapshot import add_forecast_args, warm_forecasts
+from map_artifact import entries_from_results, entries_from_static_map, write_artifact
+from metrics import add_metrics_args, instrumented_run
+from ndjson_output import NdjsonSink
+from row_sources import load_rows, find_rows_file
+from static_map import add_static_map_args, resolve_incremental, load_state, parse_static_map, read_static_map
+from watttime_auth import CredentialsError, TokenManager
+from watttime_resolver import (add_common_args, open_breaker, open_cache, open_fallback, open_hedge,
+                               open_region_index, resolve_kwargs, resolve_rows, resolve_signals, run_deadline,
+                               signal_list, stream_rows, print_results, worker_limit, make_session,
+                               AdaptiveRateLimiter)
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROWS_DIR = os.path.join(HERE, "rows")
+CLOUD_LABELS = {"azure": "Azure", "aws": "AWS", "gcp": "GCP"}
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="Resolve cloud regions to WattTime regions.")
+    ap.add_argument("--cloud", default="azure,aws,gcp", help="Comma-separated clouds (default: azure,aws,gcp)")
+    ap.add_argument("--rows-dir", default=DEFAULT_ROWS_DIR, help="Directory holding <cloud>.csv/.json/.yaml")
+    ap.add_argument("--rows", action="append", default=[], metavar="CLOUD=PATH",
+                    help="Row table for one cloud (overrides --rows-dir; repeatable)")
+    add_common_args(ap)
+    add_static_map_args(ap)
+    ap.add_argument("--ndjson", default=None, help="Stream one JSON record per resolved row to this file")
+    ap.add_argument("--checkpoint", default=None, help="Checkpoint file for --ndjson (default: <ndjson>.checkpoint)")
+    ap.add_argument("--resume", action="store_true", help="With --ndjson: skip rows already in the checkpoint")
+    ap.add_argument("--chunk-size", type=int, default=1000, help="With --ndjson: rows planned/held in memory at once")
+    add_campus_args(ap)
+    add_forecast_args(ap)
+    ap.add_argument("--artifact", default=None, metavar="PATH",
+                    help="Also write the mapping as a binary lookup artifact (see map_artifact.py)")
+    add_metrics_args(ap)
+    return ap
+
+def load_clouds(args):
+    """{cloud: rows} in --cloud order."""
+    overrides = {}
+    for spec in args.rows:
+        cloud, sep, path = spec.partition("=")
+        if not sep:
+            raise SystemExit(f"--rows expects CLOUD=PATH, got {spec!r}")
+        overrides[cloud.strip().lower()] = path
+    clouds = [c.strip().lower() for c in args.cloud.split(",") if c.strip()]
+    try:
+        return {cloud: load_rows(overrides.get(cloud) or find_rows_file(args.rows_dir, cloud)) for cloud in clouds}
+    except FileNotFoundError as e:
+        raise SystemExit(str(e))
+
+def split_by_cloud(rows_by_cloud, updated_all):
+    """Cut the concatenated updated rows back into {cloud: (updated_rows, mapping)}."""
+    results, start = {}, 0
+    for cloud, rows in rows_by_cloud.items():
+        updated_rows = updated_all[start:start + len(rows)]
+        start += len(rows)
+        results[cloud] = (updated_rows, {tup[0]: tup[7] for tup in updated_rows})
+    return results
+
+def resolve_clouds(rows_by_cloud, resolve):
+    """
+    Run every cloud's rows through a single resolve(rows) call so de-duplication spans
+    clouds, then split the results back out: {cloud: (updated_rows, mapping)}.
+    """
+    all_rows = [tup for rows in rows_by_cloud.values() for tup in rows]
+    updated_all, _ = resolve(all_rows) if all_rows else ([], {})
+    return split_by_cloud(rows_by_cloud, updated_all)
+
+def resolve_clouds_by_signal(rows_by_cloud, resolve_many):
+    """Like resolve_clouds for resolve_many(rows) -> {signal: (updated_rows, mapping)}."""
+    all_rows = [tup for rows in rows_by_cloud.values() for tup in rows]
+    by_signal = resolve_many(all_rows)
+    return {sig: split_by_cloud(rows_by_cloud, updated_all) for sig, (updated_all, _) in by_signal.items()}
+
+
+def freshness(results, fallback, signal):
+    """{cloud: {region: "fresh" | "cached" | "stale" | "failed"}} for the rows in `results`."""
+    return {cloud: {tup[0]: fallback.status(tup[5], tup[6], signal) for tup in updated_rows}
+            for cloud, (updated_rows, _mapping) in results.items()}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with instrumented_run(args):
+        try:
+            run(args)
+        except CredentialsError as e:
+            raise SystemExit(str(e))  # the first lookup that needed a login ends the run
+
+def run(args):
+    deadline = run_deadline(args)
+    signals = signal_list(args)
+    if len(signals) > 1 and (args.offline or args.incremental):
+        raise SystemExit("--signals with more than one signal cannot be combined with --offline/--incremental")
+    if args.artifact and (args.ndjson or len(signals) > 1):
+        raise SystemExit("--artifact needs a single signal and cannot be combined with --ndjson")
+    if args.samples > 1 and (args.ndjson or len(signals) > 1):
+        raise SystemExit("--samples needs a single signal and cannot be combined with --ndjson")
+    rows_by_cloud = load_clouds(args)
+
+    tokens = TokenManager.from_env()
+    index = open_region_index(args, tokens.get)
+    cache = open_cache(args)
+    session = make_session(worker_limit(args))
+    limiter = AdaptiveRateLimiter(rate=args.rate, max_rate=args.max_rate)
+    hedge = open_hedge(args)
+    breaker = open_breaker(args)
+    fallback = open_fallback(args)
+    guards = dict(hedge=hedge, breaker=breaker, fallback=fallback, deadline=deadline,
+                  max_concurrency=worker_limit(args))
+
+    def warm(abbrevs_by_signal):
+        if args.forecast_snapshot and deadline is not None and time.monotonic() >= deadline:
+            print("[INFO] deadline reached, forecast snapshot skipped")
+        elif args.forecast_snapshot:
+            warm_forecasts(abbrevs_by_signal, tokens, args.forecast_snapshot, horizon_hours=args.forecast_horizon,
+                           concurrency=args.concurrency, timeout=args.timeout, retries=args.retries,
+                           session=session, limiter=limiter, breaker=breaker, deadline=deadline)
+
+    def resolve(rows):
+        if args.samples > 1:
+            updated_rows, mapping, report = campus_resolve(
+                rows, tokens, samples=args.samples, radius_km=args.sample_radius_km, initial=args.samples_initial,
+                budget=args.sample_budget, signal=signals[0], cache=cache, index=index, session=session,
+                limiter=limiter, **guards, **resolve_kwargs(args))
+            print_campus_report(report)
+            return updated_rows, mapping
+        return resolve_rows(rows, tokens, signal=signals[0], cache=cache, index=index, session=session,
+                            limiter=limiter, **guards, **resolve_kwargs(args))
+
+    if args.ndjson:
+        if args.incremental:
+            raise SystemExit("--ndjson cannot be combined with --incremental")
+        sink = NdjsonSink(args.ndjson, args.checkpoint, signal=signals[0], resume=args.resume)
+        resolved = {sig: set() for sig in signals}
+
+        def record(cloud, tup, error, signal=None):
+            sink(cloud, tup, error, signal)
+            if error is None:
+                resolved[signal or signals[0]].add(tup[7])
+        pending = ((cloud, tup) for cloud, rows in rows_by_cloud.items() for tup in rows
+                   if not sink.is_done(cloud, tup[0], signals))
+        try:
+            stream_rows(pending, tokens, record, signals=signals, cache=cache, index=index, session=session,
+                        limiter=limiter, chunk_size=args.chunk_size, **guards, **resolve_kwargs(args))
+        finally:
+            sink.close()
+            print(sink.summary())
+            if cache is not None:
+                print(cache.summary())
+        warm(resolved)
+        return
+
+    if len(signals) > 1:
+        by_signal = resolve_clouds_by_signal(
+            rows_by_cloud,
+            lambda rows: resolve_signals(rows, tokens, signals, cache=cache, session=session, limiter=limiter,
+                                         **guards, **resolve_kwargs(args)))
+        table = {cloud: {tup[0]: {sig: by_signal[sig][cloud][1][tup[0]] for sig in signals} for tup in rows}
+                 for cloud, rows in rows_by_cloud.items()}
+        print("\n=== Per-signal mapping { cloud: { region: { signal: watttime_abbrev } } } ===")
+        print(json.dumps(table, indent=2, ensure_ascii=False), flush=True)
+        if cache is not None:
+            print(f"\n{cache.summary()}")
+        warm({sig: [a for cloud in by_signal[sig].values() for a in cloud[1].values()] for sig in signals})
+        return
+
+    if args.incremental:
+        results = resolve_incremental(rows_by_cloud, lambda todo: resolve_clouds(todo, resolve), args,
+                                      signal=signals[0])
+    else:
+        results = resolve_clouds(rows_by_cloud, resolve)
+
+    for cloud, (updated_rows, mapping) in results.items():
+        print_results(updated_rows, mapping, CLOUD_LABELS.get(cloud, cloud))
+
+    if len(results) > 1:
+        print("\n=== Combined mapping { cloud: { region: watttime_abbrev } } ===")
+        print(json.dumps({cloud: mapping for cloud, (_rows, mapping) in results.items()},
+                         indent=2, ensure_ascii=False), flush=True)
+    if fallback is not None and index is None:
+        table = freshness(results, fallback, signals[0])
+        counts = {}
+        for statuses in table.values():
+            for status in statuses.values():
+                counts[status] = counts.get(status, 0) + 1
+        print("\n=== Freshness { cloud: { region: fresh|cached|stale|failed } } ===")
+        print(json.dumps(table, indent=2, ensure_ascii=False))
+        print("[FRESHNESS] " + ", ".join(f"{counts.get(k, 0)} {k}" for k in ("fresh", "cached", "stale", "failed")))
+    if cache is not None:
+        print(f"\n{cache.summary()}")
+    if args.artifact:
+        online = index is None
+        entries = entries_from_results(results, fallback=fallback if online else None,
+                                       cache=cache if online else None, signal=signals[0])
+        if args.incremental:
+            entries = entries_from_static_map(read_static_map(args.static_map), load_state(args.state)) + entries
+        n = write_artifact(entries, args.artifact, signal=signals[0])
+        print(f"[ARTIFACT] {n} entries -> {args.artifact}")
+
+    abbrevs = [a for _rows, mapping in results.values() for a in mapping.values()]
+    if args.incremental and args.forecast_snapshot:
+        abbrevs += [e["abbrev"] for e in parse_static_map(read_static_map(args.static_map)).values()]
+    warm({signals[0]: abbrevs})
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Load region row tables from CSV / JSON / YAML files.
+
+Notes:
+- Every format yields the resolver's row tuples:
+  (region, display_name, city, country, cc, lat, lon, seed)
+- CSV: header row with those column names (seed may be blank or omitted).
+- JSON / YAML: a list of objects with those keys, or a list of 7/8-item lists.
+- YAML needs PyYAML; it is imported only when a .yaml/.yml file is loaded.
+"""
+
+import os
+import csv
+import json
+
+
+FIELDS = ("region", "display_name", "city", "country", "cc", "lat", "lon", "seed")
+EXTENSIONS = (".csv", ".json", ".yaml", ".yml")
+
+
+def _row(item, where):
+    if isinstance(item, dict):
+        values = [item.get(f, "") for f in FIELDS]
+    elif isinstance(item, (list, tuple)) and len(item) in (7, 8):
+        values = list(item) + [""] * (8 - len(item))
+    else:
+        raise ValueError(f"{where}: expected an object or a 7/8-item list, got {item!r}")
+    region, display_name, city, country, cc, lat, lon, seed = values
+    if not region or lat in ("", None) or lon in ("", None):
+        raise ValueError(f"{where}: region, lat and lon are required")
+    return (str(region), str(display_name or ""), str(city or ""), str(country or ""), str(cc or ""),
+            float(lat), float(lon), str(seed or ""))
+
+def load_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            items = list(csv.DictReader(f))
+        elif ext == ".json":
+            items = json.load(f)
+        elif ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError(f"{path}: install PyYAML to load YAML row tables")
+            items = yaml.safe_load(f) or []
+        else:
+            raise ValueError(f"{path}: unsupported row table format (use {', '.join(EXTENSIONS)})")
+    return [_row(item, f"{path}[{i}]") for i, item in enumerate(items)]
+
+def find_rows_file(rows_dir, cloud):
+    for ext in EXTENSIONS:
+        path = os.path.join(rows_dir, f"{cloud}{ext}")
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"no row table for '{cloud}' in {rows_dir} ({'/'.join(EXTENSIONS)})")
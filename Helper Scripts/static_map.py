@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Incremental refresh of the `_map` dictionary in CarbonAware.RegionMap/StaticRegionMapper.cs.
+
+Notes:
+- parse_static_map() reads the existing {("cloud","region"), "ABBREV"} entries.
+- Only rows that are new (not in `_map`), missing (blank/UNKNOWN abbrev) or changed
+  (coordinates/signal differ from the last resolution, tracked in region_map_state.json)
+  are sent to the resolver.
+- --emit diff prints a minimal unified diff (entries edited in place, new ones appended to
+  their cloud's group); --emit block prints a regenerated dictionary sorted by
+  (cloud, region); --write applies the minimal edit to the .cs file.
+"""
+
+import os
+import re
+import json
+import time
+import difflib
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATIC_MAP = os.path.join(HERE, "..", "CarbonAware.RegionMap", "StaticRegionMapper.cs")
+DEFAULT_STATE_PATH = os.path.join(HERE, "region_map_state.json")
+
+ENTRY_RE = re.compile(
+    r'^(?P<indent>\s*)\{\("(?P<cloud>[^"]+)",\s*"(?P<region>[^"]+)"\),(?P<sep>\s*)"(?P<abbrev>[^"]*)"\}'
+    r'(?P<comma>,?)(?P<tail>.*)$')
+
+
+def _key(cloud, region):
+    # StaticRegionMapper compares keys with OrdinalIgnoreCase
+    return (cloud.lower(), region.lower())
+
+
+def parse_static_map(text):
+    """
+    {(cloud, region) lowercased: {"cloud", "region", "abbrev", "line"}} in file order.
+    `line` is the 0-based line index of the entry.
+    """
+    entries = {}
+    for n, line in enumerate(text.split("\n")):
+        m = ENTRY_RE.match(line.rstrip("\r"))
+        if m:
+            entries[_key(m["cloud"], m["region"])] = {
+                "cloud": m["cloud"], "region": m["region"], "abbrev": m["abbrev"], "line": n}
+    return entries
+
+def read_static_map(path=DEFAULT_STATIC_MAP):
+    with open(path, encoding="utf-8-sig") as f:
+        return f.read()
+
+def write_static_map(text, path=DEFAULT_STATIC_MAP):
+    # keep the BOM the file was checked in with
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(text)
+
+
+def load_state(path=DEFAULT_STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=DEFAULT_STATE_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+
+def _state_key(cloud, region):
+    return "/".join(_key(cloud, region))
+
+
+def select_rows(rows, cloud, entries, state, signal="co2_moer", precision=4):
+    """
+    Split rows into (todo, reasons) where todo needs resolving and reasons maps
+    region -> "new" | "missing" | "changed". Rows already in `_map` but never seen in
+    `state` are trusted and get a state record so later coordinate edits are caught.
+    """
+    todo, reasons = [], {}
+    for tup in rows:
+        region, lat, lon = tup[0], tup[5], tup[6]
+        entry = entries.get(_key(cloud, region))
+        prev = state.get(_state_key(cloud, region))
+        if entry is None:
+            reason = "new"
+        elif entry["abbrev"] in ("", "UNKNOWN"):
+            reason = "missing"
+        elif prev is not None and (round(prev["lat"], precision) != round(lat, precision)
+                                   or round(prev["lon"], precision) != round(lon, precision)
+                                   or prev.get("signal", signal) != signal):
+            reason = "changed"
+        else:
+            if prev is None:
+                state[_state_key(cloud, region)] = {
+                    "lat": lat, "lon": lon, "signal": signal, "abbrev": entry["abbrev"], "resolved_at": None}
+            continue
+        todo.append(tup)
+        reasons[region] = reason
+    return todo, reasons
+
+def record_state(state, cloud, updated_rows, signal="co2_moer"):
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for (region, _name, _city, _country, _cc, lat, lon, abbrev) in updated_rows:
+        if abbrev:
+            state[_state_key(cloud, region)] = {
+                "lat": lat, "lon": lon, "signal": signal, "abbrev": abbrev, "resolved_at": now}
+
+
+def _format_entry(cloud, region, abbrev, indent="            ", sep="", comma=",", tail=""):
+    return f'{indent}{{("{cloud}","{region}"),{sep}"{abbrev}"}}{comma}{tail}'
+
+def apply_updates(text, cloud, mapping):
+    """
+    Minimal edit of the .cs source: change abbrevs in place and append new entries after
+    the last entry of the same cloud (or at the end of the dictionary). Blank abbrevs
+    (failed lookups) are never written.
+    """
+    lines = text.split("\n")
+    entries = parse_static_map(text)
+    new = []
+    for region, abbrev in mapping.items():
+        if not abbrev:
+            continue
+        entry = entries.get(_key(cloud, region))
+        if entry is None:
+            new.append((region, abbrev))
+            continue
+        if entry["abbrev"] != abbrev:
+            n = entry["line"]
+            cr = "\r" if lines[n].endswith("\r") else ""
+            m = ENTRY_RE.match(lines[n].rstrip("\r"))
+            lines[n] = _format_entry(m["cloud"], m["region"], abbrev, m["indent"], m["sep"],
+                                     m["comma"], m["tail"]) + cr
+
+    if new:
+        same_cloud = [e for e in entries.values() if e["cloud"].lower() == cloud.lower()]
+        anchor = max((e["line"] for e in (same_cloud or entries.values())), default=None)
+        if anchor is None:
+            raise ValueError("no _map entries found to anchor new regions")
+        cr = "\r" if lines[anchor].endswith("\r") else ""
+        m = ENTRY_RE.match(lines[anchor].rstrip("\r"))
+        is_last = m["comma"] == ""
+        if is_last:
+            lines[anchor] = _format_entry(m["cloud"], m["region"], m["abbrev"], m["indent"], m["sep"],
+                                          ",", m["tail"]) + cr
+        added = [_format_entry(cloud, region, abbrev, m["indent"], m["sep"]) + cr for region, abbrev in new]
+        if is_last:
+            added[-1] = added[-1].replace("},", "}", 1)
+        lines[anchor + 1:anchor + 1] = added
+    return "\n".join(lines)
+
+def render_block(text, mapping_by_cloud=None):
+    """Whole `_map` initializer, entries merged with `mapping_by_cloud` and sorted by (cloud, region)."""
+    merged = {}
+    for line in text.split("\n"):
+        m = ENTRY_RE.match(line.rstrip("\r"))
+        if m:
+            merged[_key(m["cloud"], m["region"])] = (m["cloud"], m["region"], m["abbrev"], m["tail"])
+    for cloud, mapping in (mapping_by_cloud or {}).items():
+        for region, abbrev in mapping.items():
+            if abbrev:
+                tail = merged.get(_key(cloud, region), ("", "", "", ""))[3]
+                merged[_key(cloud, region)] = (cloud, region, abbrev, tail)
+    ordered = [merged[k] for k in sorted(merged)]
+    out = [_format_entry(c, r, a, comma=",", tail=t) for (c, r, a, t) in ordered]
+    if out:
+        last = ordered[-1]
+        out[-1] = _format_entry(*last[:3], comma="", tail=last[3])
+    return "\n".join(out)
+
+def unified_diff(old, new, path=DEFAULT_STATIC_MAP):
+    name = os.path.relpath(os.path.abspath(path), os.path.join(HERE, "..")).replace(os.sep, "/")
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f"a/{name}", tofile=f"b/{name}"))
+
+
+def add_static_map_args(ap):
+    ap.add_argument("--incremental", action="store_true",
+                    help="Only resolve rows that are new/changed/missing in StaticRegionMapper.cs")
+    ap.add_argument("--static-map", default=DEFAULT_STATIC_MAP, help="Path to StaticRegionMapper.cs")
+    ap.add_argument("--state", default=DEFAULT_STATE_PATH, help="Last-resolved coordinates per (cloud, region)")
+    ap.add_argument("--emit", choices=("diff", "block"), default="diff",
+                    help="With --incremental: minimal diff or full sorted dictionary block")
+    ap.add_argument("--write", action="store_true", help="With --incremental: apply the edit to the .cs file")
+    return ap
+
+def resolve_incremental(rows_by_cloud, resolve, args, signal=None):
+    """
+    Incremental mode. `resolve({cloud: todo_rows})` must return {cloud: (updated_rows, mapping)}.
+    Prints the diff/block and returns the same shape for just the re-resolved rows.
+    `signal` is the one being resolved (default: args.signal).
+    """
+    signal = signal or args.signal
+    text = read_static_map(args.static_map)
+    entries = parse_static_map(text)
+    state = load_state(args.state)
+    todo_by_cloud = {}
+    for cloud, rows in rows_by_cloud.items():
+        todo, reasons = select_rows(rows, cloud, entries, state, signal=signal, precision=args.precision)
+        todo_by_cloud[cloud] = todo
+        print(f"[PLAN] {cloud}: {len(todo)} of {len(rows)} rows need resolving"
+              + "".join(f"\n  {reason:>7}: {region}" for region, reason in reasons.items()))
+
+    if any(todo_by_cloud.values()):
+        results = resolve(todo_by_cloud)
+    else:
+        results = {cloud: ([], {}) for cloud in todo_by_cloud}
+
+    new_text = text
+    for cloud, (updated_rows, mapping) in results.items():
+        record_state(state, cloud, updated_rows, signal=signal)
+        new_text = apply_updates(new_text, cloud, mapping)
+
+    if args.emit == "block":
+        print("\n=== Regenerated _map block ===")
+        print(render_block(text, {cloud: mapping for cloud, (_rows, mapping) in results.items()}))
+    else:
+        print("\n=== StaticRegionMapper.cs diff ===")
+        print(unified_diff(text, new_text, args.static_map) or "(no changes)")
+    if args.write and new_text != text:
+        write_static_map(new_text, args.static_map)
+        print(f"[INFO] wrote {args.static_map}")
+    if args.write or new_text == text:
+        # only remember coordinates once the .cs file actually reflects them
+        save_state(state, args.state)
+    return results
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+WattTime bearer-token manager shared by the helper scripts.
+
+Notes:
+- Credentials come from WATTTIME_USER / WATTTIME_PASSWORD (never hard-coded). They are
+  only required once a token is actually needed, so offline and fully cached runs work
+  without them. A login without them raises CredentialsError, a local setup problem
+  that callers let end the run instead of counting it as an API failure.
+- WATTTIME_API_BASE points every helper at another server (e.g. mock_watttime.py).
+- The token and its expiry are cached in ~/.cache/watttime/token.json, so scripts run
+  back to back log in once. The token is refreshed proactively `refresh_margin`
+  seconds before it expires.
+- Thread-safe: concurrent workers that hit a 401 with the same stale token trigger a
+  single re-login.
+"""
+
+import os
+import json
+import time
+import base64
+import threading
+
+from metrics import METRICS
+from region_cache import CACHE_DIR
+
+
+API_BASE = os.environ.get("WATTTIME_API_BASE", "https://api.watttime.org").rstrip("/")
+LOGIN_LEGACY = f"{API_BASE}/login"
+DEFAULT_TOKEN_PATH = os.path.join(CACHE_DIR, "token.json")
+TOKEN_LIFETIME = 30 * 60  # WattTime tokens are valid for 30 minutes
+
+
+class CredentialsError(RuntimeError):
+    """A login is needed but WATTTIME_USER / WATTTIME_PASSWORD are not set."""
+
+
+def login(username, password, timeout=20, session=None, url=None):
+    import requests
+    from requests.auth import HTTPBasicAuth
+    http = session or requests
+    rsp = http.get(url or LOGIN_LEGACY, auth=HTTPBasicAuth(username, password), timeout=timeout)
+    if rsp.status_code == 401:
+        raise RuntimeError("Login failed (401). Check WATTTIME_USER / WATTTIME_PASSWORD.")
+    rsp.raise_for_status()
+    return rsp.json()['token']
+
+def token_expiry(token, issued_at=None):
+    """`exp` claim if the token is a JWT, else issued_at + TOKEN_LIFETIME."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        if exp:
+            return float(exp)
+    except Exception:
+        pass
+    return (issued_at or time.time()) + TOKEN_LIFETIME
+
+
+class TokenManager:
+    def __init__(self, username, password, path=DEFAULT_TOKEN_PATH, refresh_margin=120,
+                 login_url=None, session=None):
+        self.username = username
+        self.password = password
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self.login_url = login_url
+        self.session = session
+        self.logins = 0
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Manager for WATTTIME_USER / WATTTIME_PASSWORD; missing credentials only fail on get()."""
+        return cls(os.environ.get("WATTTIME_USER"), os.environ.get("WATTTIME_PASSWORD"), **kwargs)
+
+    def _fresh(self, expires_at):
+        return expires_at - self.refresh_margin > time.time()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        if cached.get("user") == self.username and self._fresh(cached.get("expires_at", 0)):
+            self._token, self._expires_at = cached["token"], cached["expires_at"]
+
+    def _store(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"user": self.username, "token": self._token, "expires_at": self._expires_at}, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    def _login(self, timeout=20):
+        if not self.username or not self.password:
+            raise CredentialsError("Set WATTTIME_USER and WATTTIME_PASSWORD to log in to WattTime.")
+        issued_at = time.time()
+        with METRICS.span("login"):
+            token = login(self.username, self.password, timeout=timeout, session=self.session, url=self.login_url)
+        METRICS.incr("logins_total")
+        self.logins += 1
+        self._token, self._expires_at = token, token_expiry(token, issued_at)
+        self._store()
+
+    def get(self, timeout=20):
+        """A token valid for at least `refresh_margin` more seconds (`timeout` bounds a login)."""
+        with self._lock:
+            if self._token is None and self.path:
+                self._load()
+            if self._token is None or not self._fresh(self._expires_at):
+                self._login(timeout)
+            return self._token
+
+    def invalidate(self, token):
+        """Call after a 401; re-logs in once even if many workers report the same token."""
+        with self._lock:
+            if token == self._token:
+                self._token, self._expires_at = None, 0.0
+                if self.path and os.path.exists(self.path):
+                    os.remove(self.path)
@@ -0,0 +1,666 @@
+#!/usr/bin/env python3
+"""
+Shared WattTime region resolver used by the *_to_WattTime.py helper scripts.
+
+Notes:
+- Rows are (region, display_name, city, country, cc, lat, lon, seed) tuples.
+- All rows are resolved concurrently (bounded by --concurrency) over one pooled
+  keep-alive session; results keep the input order.
+- Answers are cached on disk (region_cache.py); only misses go to the network.
+- Rows are first grouped by quantized (lat, lon, signal); each unique point is looked
+  up once and the answer fanned back out to every row that shares it.
+- `token` may be a plain string or a watttime_auth.TokenManager; with a manager, a 401
+  triggers one transparent re-login instead of failing the row.
+- Request rate is paced by an AIMD token bucket (rate_limit.py) that ramps up until the
+  API answers 429 and honors Retry-After.
+- Every lookup attempt, rate-limit wait, backoff sleep and normalization is timed into
+  metrics.METRICS, with counters for statuses, retries, cache hits and bytes received.
+- --hedge duplicates requests that run past the observed p95 (hedging.py), capped at a
+  small fraction of all requests, to bound tail latency.
+- A circuit breaker (circuit_breaker.py) stops sending requests after --breaker-threshold
+  consecutive failures; failed lookups are then answered from the last-known-good snapshot
+  (marked stale) instead of falling back to the empty seed.
+- --deadline bounds the whole run: lookups start in priority order (unknown points, then
+  the stalest, then the rest), concurrency grows if the remaining work would not fit, and
+  whatever is unresolved at the deadline keeps its stale fallback or seed ([COVERAGE]).
+- --offline resolves against a local region boundary GeoJSON (region_index.py) instead.
+"""
+
+import os
+import sys
+import math
+import time
+import json
+import asyncio
+import itertools
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from region_cache import RegionCache, CACHE_DIR, DEFAULT_CACHE_PATH, DEFAULT_TTL
+from watttime_auth import API_BASE, CredentialsError, TokenManager
+from rate_limit import AdaptiveRateLimiter, RETRYABLE_STATUS, backoff_delay, parse_retry_after
+from circuit_breaker import CircuitBreaker, LastKnownGood, StaleAnswer, DEFAULT_FALLBACK_PATH
+from hedging import HedgePolicy
+from metrics import METRICS
+
+REGION_FROM_LOC_URL = f"{API_BASE}/v3/region-from-loc"
+
+
+class DeadlineExceeded(TimeoutError):
+    """The run's --deadline passed before this lookup finished."""
+
+
+class ResolveStats:
+    """Planned rows vs. unique lookups vs. HTTP requests actually issued."""
+
+    def __init__(self):
+        self.rows = 0
+        self.unique = 0
+        self.requests = 0
+        self.skipped = 0   # lookups cut off by the deadline
+        self.results = 0   # (row, signal) results handed back
+        self.covered = 0   # ... of which carry an abbrev (fresh, stale or seed)
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def summary(self):
+        return f"[PLAN] {self.rows} rows -> {self.unique} unique lookups -> {self.requests} HTTP requests"
+
+    def coverage(self):
+        pct = 100.0 * self.covered / self.results if self.results else 100.0
+        return (f"[COVERAGE] {self.covered} of {self.results} results have an abbrev ({pct:.1f}%); "
+                f"{self.skipped} lookups cut off by the deadline")
+
+
+class DaemonExecutor(Executor):
+    """
+    Runs every call on its own daemon thread. Used for deadline runs: a lookup abandoned
+    at the deadline must not keep the process alive (ThreadPoolExecutor threads are
+    joined at interpreter exit). Callers bound how many calls are in flight.
+    """
+
+    def submit(self, fn, /, *args, **kwargs):
+        fut = Future()
+
+        def run():
+            if not fut.set_running_or_notify_cancel():
+                return
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+
+        threading.Thread(target=run, daemon=True, name="deadline-lookup").start()
+        return fut
+
+
+def make_session(pool_size=8):
+    """requests.Session whose connection pool can keep `pool_size` sockets alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def api_get(url, token, params, timeout=20, retries=3, backoff=0.6, session=None, stats=None, limiter=None,
+            span="api_attempt", hedge=None, breaker=None, deadline=None):
+    """
+    GET a WattTime endpoint and return its JSON payload.
+    Retries only 429/5xx/timeouts (jittered exponential backoff, Retry-After wins);
+    any other 4xx fails fast. Each attempt is timed into METRICS under `span`; with a
+    HedgePolicy, a slow attempt may be raced against one duplicate. With a CircuitBreaker,
+    attempts fail immediately (CircuitOpenError) while it is open. With a `deadline`
+    (a time.monotonic() value), every send and login is timed out at it, no rate-limiter
+    wait or retry runs past it, and DeadlineExceeded is raised once it has passed.
+    """
+    http = session or requests
+    tokens = token if isinstance(token, TokenManager) else None
+
+    def time_left():
+        """`timeout`, clamped to the deadline right before a send or login."""
+        if deadline is None:
+            return timeout
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceeded("deadline reached before the request was sent")
+        return min(timeout, left)
+
+    def take_slot():
+        if limiter is not None:
+            with METRICS.span("rate_limit_wait"):
+                if not limiter.acquire(deadline):
+                    raise DeadlineExceeded("deadline reached while waiting for the rate limiter")
+        if stats is not None:
+            stats.count_request()
+
+    def get(bearer):
+        def send():
+            return http.get(url, headers={"Authorization": f"Bearer {bearer}"}, params=params, timeout=time_left())
+
+        take_slot()
+        with METRICS.span(span):
+            resp = hedge.call(send, before_hedge=take_slot) if hedge is not None else send()
+        # resp.elapsed stops at the response headers: roughly connect + server time
+        METRICS.observe("http_time_to_headers", resp.elapsed.total_seconds())
+        METRICS.incr("http_responses_total", status=resp.status_code)
+        METRICS.incr("bytes_received_total", len(resp.content))
+        return resp
+
+    relogged = False
+    last = None
+    for attempt in range(1, retries + 1):
+        if breaker is not None:
+            breaker.before_request()
+        try:
+            bearer = tokens.get(time_left()) if tokens else token
+            resp = get(bearer)
+            if resp.status_code == 401 and tokens and not relogged:
+                # token expired or revoked server-side: log in again and retry right away
+                tokens.invalidate(bearer)
+                relogged = True
+                resp = get(tokens.get(time_left()))
+        except (requests.Timeout, requests.ConnectionError) as e:
+            if breaker is not None:
+                breaker.on_failure()
+            last = e
+            delay = backoff_delay(backoff, attempt)
+            reason = type(e).__name__
+            METRICS.incr("http_errors_total", kind=reason)
+        except (DeadlineExceeded, CredentialsError):
+            # neither says anything about the API; just release a half-open probe
+            if breaker is not None:
+                breaker.on_abandoned()
+            raise
+        except BaseException:
+            # e.g. a failed re-login: a half-open probe must still settle the breaker
+            if breaker is not None:
+                breaker.on_failure()
+            raise
+        else:
+            if breaker is not None:
+                # only server-side failures count; any other answer means the API is up
+                if resp.status_code >= 500:
+                    breaker.on_failure()
+                else:
+                    breaker.on_success()
+            if resp.status_code == 401:
+                raise RuntimeError("Unauthorized (401). Check credentials.")
+            if resp.status_code not in RETRYABLE_STATUS:
+                resp.raise_for_status()  # other 4xx will never succeed: fail fast
+                data = resp.json()
+                if limiter is not None:
+                    limiter.on_success()
+                return data
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429 and limiter is not None:
+                limiter.on_throttle(retry_after)
+            last = requests.HTTPError(f"{resp.status_code} {resp.reason} for url: {resp.url}", response=resp)
+            delay = retry_after if retry_after is not None else backoff_delay(backoff, attempt)
+            reason = resp.status_code
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            break
+        if attempt < retries:
+            METRICS.incr("retries_total", reason=reason)
+            with METRICS.span("backoff_sleep"):
+                time.sleep(delay)
+    raise last
+
+def region_from_loc(token, lat, lon, signal="co2_moer", timeout=20, retries=3, backoff=0.6,
+                    session=None, cache=None, stats=None, limiter=None, hedge=None, breaker=None, deadline=None):
+    """Raw region-from-loc payload for one point (cache first, then api_get)."""
+    if cache is not None:
+        cached = cache.get(lat, lon, signal)
+        METRICS.incr("cache_lookups_total", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+    data = api_get(REGION_FROM_LOC_URL, token, {"latitude": lat, "longitude": lon, "signal_type": signal},
+                   timeout=timeout, retries=retries, backoff=backoff, session=session, stats=stats,
+                   limiter=limiter, span="region_from_loc_attempt", hedge=hedge, breaker=breaker,
+                   deadline=deadline)
+    if cache is not None:
+        cache.put(lat, lon, signal, data)
+    return data
+
+def normalize_region_abbrev(data) -> str:
+    """
+    Accepts any of:
+      - "PJM_DC"
+      - {"region": "PJM_DC"}
+      - {"region": {"abbrev": "PJM_DC", "name": "...", "id": "..."}}
+      - {"abbrev": "...", "name": "...", "id": "..."}
+    Returns a single canonical abbrev string (falls back to name/id), else "UNKNOWN".
+    """
+    # Bare string
+    if isinstance(data, str):
+        return data.strip() or "UNKNOWN"
+
+    # Dict forms
+    if isinstance(data, dict):
+        # Common case: {"region": ...}
+        inner = data.get("region", data)
+
+        # If inner is a bare string
+        if isinstance(inner, str):
+            return inner.strip() or "UNKNOWN"
+
+        # If inner is a dict with fields
+        if isinstance(inner, dict):
+            return inner.get("abbrev") or inner.get("name") or inner.get("id") or "UNKNOWN"
+
+    # Any other type (list/None/etc.)
+    return "UNKNOWN"
+
+
+def quantize(lat, lon, precision=4):
+    return (round(lat, precision), round(lon, precision))
+
+def plan_lookups(rows, signal="co2_moer", precision=4):
+    """
+    Group row indices by quantized (lat, lon, signal); `signal` may also be a list of
+    signals, in which case every point is planned once per signal.
+    Returns {(qlat, qlon, signal): [row_index, ...]} in first-seen order.
+    """
+    signals = [signal] if isinstance(signal, str) else list(signal)
+    plan = {}
+    for sig in signals:
+        for i, tup in enumerate(rows):
+            qlat, qlon = quantize(tup[5], tup[6], precision)
+            plan.setdefault((qlat, qlon, sig), []).append(i)
+    return plan
+
+
+def prioritize_plan(plan, rows, cache=None, fallback=None):
+    """
+    Reorder plan keys for deadline runs: points with no cached, last-known-good or seeded
+    value first, then the ones whose newest known answer is stalest, then the rest (seeded
+    rows with no recorded answer age).
+    """
+    def priority(item):
+        (qlat, qlon, sig), indices = item
+        age = cache.age(qlat, qlon, sig) if cache is not None else None
+        if age is None and fallback is not None:
+            age = fallback.age(qlat, qlon, sig)
+        if age is not None:
+            return (1, -age)
+        return (2, 0.0) if all(rows[i][7] for i in indices) else (0, 0.0)
+
+    return dict(sorted(plan.items(), key=priority))
+
+def _print_summaries(stats, limiter=None, hedge=None, breaker=None, fallback=None, deadline=None):
+    print(stats.summary())
+    for part in (limiter, hedge, breaker, fallback):
+        if part is not None:
+            print(part.summary())
+    if deadline is not None:
+        print(stats.coverage())
+
+
+def _apply_result(tup, abbrev, error, signal=None, log=True):
+    """
+    Row tuple with its resolved abbrev (a stale last-known-good one, or its seed on failure),
+    logging the outcome.
+    """
+    (region, display_name, city, country, cc, lat, lon, _seed) = tup
+    label = f"{region:>22}" + (f" [{signal}]" if signal else "")
+    if error is None:
+        if log:
+            print(f"[OK] {label} @ ({lat:.4f}, {lon:.4f}) -> {abbrev}")
+        return (region, display_name, city, country, cc, lat, lon, abbrev)
+    if isinstance(error, StaleAnswer):
+        if log:
+            print(f"[STALE] {label} -> {abbrev} ({error})")
+        return (region, display_name, city, country, cc, lat, lon, abbrev)
+    # Preserve seed if lookup fails
+    if log:
+        print(f"[WARN] {label} failed: {error}")
+    return (region, display_name, city, country, cc, lat, lon, _seed)
+
+
+async def _lookup_online(plan, token, concurrency, timeout, retries, session, cache, stats, limiter,
+                         on_result=None, hedge=None, breaker=None, fallback=None, deadline=None,
+                         max_concurrency=None):
+    """
+    One region_from_loc per plan key; returns [(abbrev, error), ...] in plan order.
+    on_result(n, (abbrev, error)) is called as soon as the n-th key finishes.
+    With a LastKnownGood `fallback`, answers are recorded into it and failures are answered
+    from it as (abbrev, StaleAnswer) where possible.
+    Keys are started in plan order. With a `deadline` (time.monotonic() value), every send
+    is timed out at the deadline (see api_get), lookups run on daemon threads, extra
+    workers (up to `max_concurrency`) are added while the remaining keys would not finish
+    in time, and whatever has not finished at the deadline is returned as DeadlineExceeded
+    (or its stale fallback).
+    """
+    keys = list(plan)
+    concurrency = max(1, concurrency)
+    max_concurrency = max(concurrency, max_concurrency or concurrency)
+    session = session or make_session(max_concurrency)
+    loop = asyncio.get_running_loop()
+    results = [None] * len(keys)
+    order = iter(range(len(keys)))  # shared by all workers: each pulls the next key in priority order
+    latencies = []
+
+    def finish(n, result):
+        results[n] = result
+        if on_result is not None:
+            on_result(n, result)
+
+    def failed(qlat, qlon, sig, error):
+        return fallback.fallback(qlat, qlon, sig, error) if fallback is not None else (None, error)
+
+    pool = ThreadPoolExecutor(max_workers=max_concurrency) if deadline is None else DaemonExecutor()
+
+    async def worker():
+        for n in order:
+            qlat, qlon, sig = keys[n]
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                stats.skipped += 1
+                finish(n, failed(qlat, qlon, sig, DeadlineExceeded("deadline reached before this lookup started")))
+                continue
+            started = time.monotonic()
+            try:
+                data = await loop.run_in_executor(
+                    pool,
+                    lambda: region_from_loc(token, qlat, qlon, signal=sig, timeout=timeout,
+                                            retries=retries, session=session, cache=cache, stats=stats,
+                                            limiter=limiter, hedge=hedge, breaker=breaker, deadline=deadline))
+                # prefer abbrev (e.g., PJM_DC), else name, else id
+                with METRICS.span("normalize_region_abbrev"):
+                    result = (normalize_region_abbrev(data), None)
+                if fallback is not None:
+                    # a cache hit keeps the time WattTime actually answered, not this run's
+                    age = cache.age(qlat, qlon, sig) if cache is not None else None
+                    fallback.put(qlat, qlon, sig, result[0], fetched_at=None if age is None else time.time() - age)
+            except CredentialsError:
+                raise  # every other lookup needs a login too: end the run (see the wait below)
+            except Exception as e:
+                result = failed(qlat, qlon, sig, e)
+            latencies.append(time.monotonic() - started)
+            finish(n, result)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(keys)))]
+    if not workers:
+        pool.shutdown()
+        return results
+
+    def crashed():
+        return any(w.done() and not w.cancelled() and w.exception() is not None for w in workers)
+
+    try:
+        while deadline is not None and not all(w.done() for w in workers) and not crashed():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            await asyncio.wait(workers, timeout=min(0.25, left), return_when=asyncio.FIRST_EXCEPTION)
+            # behind schedule? add workers so the remaining keys fit into the time left
+            remaining = sum(1 for r in results if r is None)
+            if latencies and len(workers) < max_concurrency and remaining > len(workers):
+                avg = sum(latencies[-50:]) / len(latencies[-50:])
+                needed = math.ceil(remaining * avg / max(left, 1e-3))
+                extra = min(max_concurrency, needed, remaining) - len(workers)
+                if extra > 0:
+                    workers += [asyncio.ensure_future(worker()) for _ in range(extra)]
+                    print(f"[DEADLINE] {remaining} lookups left, {left:.1f}s to go: concurrency -> {len(workers)}")
+        await asyncio.wait(workers, timeout=None if deadline is None else max(0.0, deadline - time.monotonic()),
+                           return_when=asyncio.FIRST_EXCEPTION)
+        for w in workers:
+            if w.done() and not w.cancelled() and w.exception() is not None:
+                raise w.exception()  # e.g. a failing on_result sink or CredentialsError
+    finally:
+        for w in workers:
+            w.cancel()
+        # at the deadline, abandon in-flight lookups (their sends are timed out at it anyway)
+        pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+    cut_off = 0
+    for n, result in enumerate(results):
+        if result is None:
+            stats.skipped += 1
+            cut_off += 1
+            qlat, qlon, sig = keys[n]
+            finish(n, failed(qlat, qlon, sig, DeadlineExceeded("deadline reached while this lookup was in flight")))
+    if cut_off:
+        print(f"[DEADLINE] deadline reached, {cut_off} lookups abandoned")
+        sys.stdout.flush()  # a job killed at its time box should still leave what got out
+    return results
+
+async def _resolve_plan(plan, token, index, concurrency, timeout, retries, session, cache, stats, limiter,
+                        on_result=None, hedge=None, breaker=None, fallback=None, deadline=None,
+                        max_concurrency=None):
+    if index is None:
+        return await _lookup_online(plan, token, concurrency, timeout, retries, session, cache, stats,
+                                    limiter, on_result, hedge, breaker, fallback, deadline, max_concurrency)
+    with METRICS.span("offline_index_lookup"):
+        found = index.lookup_many([k[0] for k in plan], [k[1] for k in plan])
+    results = [(normalize_region_abbrev(props), None) if props is not None
+               else (None, LookupError("point is outside every region in the map"))
+               for props in found]
+    if on_result is not None:
+        for n, result in enumerate(results):
+            on_result(n, result)
+    return results
+
+
+async def resolve_signals_async(rows, token, signals=("co2_moer",), concurrency=8, timeout=20.0,
+                                retries=3, rate=4.0, max_rate=50.0, precision=4, session=None, cache=None,
+                                stats=None, index=None, limiter=None, hedge=None, breaker=None, fallback=None,
+                                deadline=None, max_concurrency=None):
+    """
+    Resolve every row for each of `signals` in one concurrent pass, at most `concurrency`
+    requests in flight. Duplicate coordinates are coalesced into a single lookup per signal
+    (see plan_lookups). With a RegionIndex (single signal only), all unique points are
+    resolved offline in one vectorized pass.
+    With a `deadline` (time.monotonic() value), lookups run in prioritize_plan order and
+    rows still unresolved when it passes keep their stale fallback or seed.
+    Returns {signal: (updated_rows, mapping)}, rows in input order.
+    """
+    signals = list(dict.fromkeys(signals))
+    if index is not None and len(signals) > 1:
+        raise ValueError("an offline region index covers a single signal")
+    stats = stats if stats is not None else ResolveStats()
+    plan = plan_lookups(rows, signals, precision)
+    stats.rows += len(rows)
+    stats.unique += len(plan)
+    if deadline is not None:
+        plan = prioritize_plan(plan, rows, cache, fallback)
+
+    if index is None:
+        limiter = limiter or AdaptiveRateLimiter(rate=rate, max_rate=max_rate)
+    results = await _resolve_plan(plan, token, index, concurrency, timeout, retries, session, cache,
+                                  stats, limiter, hedge=hedge, breaker=breaker, fallback=fallback,
+                                  deadline=deadline, max_concurrency=max_concurrency)
+
+    if fallback is not None:
+        fallback.save()
+
+    updated = {sig: [None] * len(rows) for sig in signals}
+    for (_qlat, _qlon, sig), indices, (abbrev, error) in zip(plan, plan.values(), results):
+        for i in indices:
+            updated[sig][i] = _apply_result(rows[i], abbrev, error, sig if len(signals) > 1 else None)
+            stats.results += 1
+            stats.covered += bool(updated[sig][i][7])
+
+    _print_summaries(stats, limiter, hedge, breaker, fallback, deadline)
+    return {sig: (updated_rows, {tup[0]: tup[7] for tup in updated_rows})
+            for sig, updated_rows in updated.items()}
+
+async def resolve_rows_async(rows, token, signal="co2_moer", **kwargs):
+    """
+    Single-signal resolve_signals_async.
+    Returns (updated_rows, mapping) in input order, same shape as the old sequential loop.
+    """
+    return (await resolve_signals_async(rows, token, [signal], **kwargs))[signal]
+
+async def stream_rows_async(tagged_rows, token, sink, signals=("co2_moer",), concurrency=8, timeout=20.0,
+                            retries=3, rate=4.0, max_rate=50.0, precision=4, session=None, cache=None,
+                            stats=None, index=None, limiter=None, chunk_size=1000, log_rows=True, hedge=None,
+                            breaker=None, fallback=None, deadline=None, max_concurrency=None):
+    """
+    Streaming variant of resolve_rows_async for large or resumable runs.
+    `tagged_rows` is any iterable of (tag, row) pairs (tag is e.g. the cloud); it is consumed
+    `chunk_size` rows at a time, so memory stays bounded. sink(tag, updated_row, error, signal)
+    is called for every row and signal as soon as its lookup completes (completion order, not
+    input order). The next chunk is only pulled once the previous one is done.
+    log_rows=False drops the per-row [OK]/[WARN] lines (bulk runs). A `deadline` applies to
+    the whole stream: once it passes, remaining rows get their stale fallback or seed.
+    Returns the ResolveStats.
+    """
+    signals = list(dict.fromkeys(signals))
+    if index is not None and len(signals) > 1:
+        raise ValueError("an offline region index covers a single signal")
+    stats = stats if stats is not None else ResolveStats()
+    if index is None:
+        limiter = limiter or AdaptiveRateLimiter(rate=rate, max_rate=max_rate)
+        session = session or make_session(concurrency)
+    tagged_rows = iter(tagged_rows)
+    while True:
+        chunk = list(itertools.islice(tagged_rows, max(1, chunk_size)))
+        if not chunk:
+            break
+        rows = [tup for _tag, tup in chunk]
+        plan = plan_lookups(rows, signals, precision)
+        stats.rows += len(rows)
+        stats.unique += len(plan)
+        if deadline is not None:
+            plan = prioritize_plan(plan, rows, cache, fallback)
+        keys, members = list(plan), list(plan.values())
+
+        def deliver(n, result):
+            abbrev, error = result
+            sig = keys[n][2]
+            for i in members[n]:
+                tag, tup = chunk[i]
+                updated_row = _apply_result(tup, abbrev, error, sig if len(signals) > 1 else None, log_rows)
+                stats.results += 1
+                stats.covered += bool(updated_row[7])
+                sink(tag, updated_row, error, sig)
+
+        await _resolve_plan(plan, token, index, concurrency, timeout, retries, session, cache, stats,
+                            limiter, on_result=deliver, hedge=hedge, breaker=breaker, fallback=fallback,
+                            deadline=deadline, max_concurrency=max_concurrency)
+        if fallback is not None:
+            fallback.save()
+
+    _print_summaries(stats, limiter, hedge, breaker, fallback, deadline)
+    return stats
+
+def resolve_rows(rows, token, **kwargs):
+    """Blocking wrapper around resolve_rows_async for the CLI scripts."""
+    return asyncio.run(resolve_rows_async(rows, token, **kwargs))
+
+def resolve_signals(rows, token, signals, **kwargs):
+    """Blocking wrapper around resolve_signals_async."""
+    return asyncio.run(resolve_signals_async(rows, token, signals, **kwargs))
+
+def stream_rows(tagged_rows, token, sink, **kwargs):
+    """Blocking wrapper around stream_rows_async."""
+    return asyncio.run(stream_rows_async(tagged_rows, token, sink, **kwargs))
+
+
+def add_common_args(ap):
+    ap.add_argument("--signal", default="co2_moer", help="WattTime signal_type (default: co2_moer)")
+    ap.add_argument("--signals", default=None,
+                    help="Comma-separated signal_types resolved in one pass (e.g. co2_moer,co2_aoer,health_damage)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Max lookups in flight (default: 8)")
+    ap.add_argument("--rate", type=float, default=4.0, help="Initial request rate, req/s (ramps up until 429)")
+    ap.add_argument("--max-rate", type=float, default=50.0, help="Request rate ceiling, req/s")
+    ap.add_argument("--retries", type=int, default=3, help="Retries per API call")
+    ap.add_argument("--timeout", type=float, default=20.0, help="HTTP timeout seconds")
+    ap.add_argument("--precision", type=int, default=4, help="Decimals kept when de-duplicating/caching coordinates")
+    ap.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="SQLite lookup cache file")
+    ap.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Cache entry lifetime (seconds)")
+    ap.add_argument("--refresh", action="store_true", help="Ignore cached answers but store fresh ones")
+    ap.add_argument("--no-cache", action="store_true", help="Neither read nor write the lookup cache")
+    ap.add_argument("--hedge", action="store_true",
+                    help="Race a duplicate request when one runs past the observed --hedge-percentile")
+    ap.add_argument("--hedge-percentile", type=float, default=95.0, help="Latency percentile that triggers a hedge")
+    ap.add_argument("--hedge-max-fraction", type=float, default=0.05,
+                    help="Most requests that may be hedged, as a fraction of all requests (default: 0.05)")
+    ap.add_argument("--deadline", type=float, default=None,
+                    help="Seconds the whole run may take; unresolved rows are reported, not waited for")
+    ap.add_argument("--max-concurrency", type=int, default=None,
+                    help="With --deadline: concurrency may grow to this to finish in time (default: 4x)")
+    ap.add_argument("--breaker-threshold", type=int, default=5,
+                    help="Consecutive failed requests that open the circuit breaker (0 = never)")
+    ap.add_argument("--breaker-cooldown", type=float, default=30.0, help="Seconds before an open breaker probes again")
+    ap.add_argument("--fallback", default=DEFAULT_FALLBACK_PATH,
+                    help="Last-known-good snapshot failed lookups fall back to (updated after every run)")
+    ap.add_argument("--no-fallback", action="store_true", help="Fall back to the row seed only, as before")
+    ap.add_argument("--offline", action="store_true", help="Resolve against the region boundary GeoJSON, no per-row calls")
+    ap.add_argument("--region-map", default=None,
+                    help="Region boundary GeoJSON for --offline (downloaded once if missing)")
+    return ap
+
+def open_region_index(args, get_token):
+    """RegionIndex for --offline runs (None otherwise); calls get_token() only to download the map."""
+    if not args.offline:
+        return None
+    from region_index import RegionIndex, download_region_map
+    signal = signal_list(args)[0]  # --offline covers a single signal, given as --signal or --signals
+    path = args.region_map or os.path.join(CACHE_DIR, f"maps_{signal}.geojson")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        download_region_map(get_token(), path, signal=signal)
+        print(f"[INFO] downloaded region map -> {path}")
+    return RegionIndex.from_file(path)
+
+def worker_limit(args):
+    """Most lookups in flight: --concurrency, or --max-concurrency (default 4x) with --deadline."""
+    if args.deadline is None:
+        return args.concurrency
+    return args.max_concurrency or 4 * args.concurrency
+
+def open_hedge(args):
+    """HedgePolicy for --hedge runs, else None."""
+    if not args.hedge:
+        return None
+    return HedgePolicy(percentile=args.hedge_percentile, max_fraction=args.hedge_max_fraction,
+                       workers=2 * worker_limit(args))
+
+def run_deadline(args):
+    """Absolute time.monotonic() deadline for --deadline, counted from now; else None."""
+    return None if args.deadline is None else time.monotonic() + args.deadline
+
+def open_breaker(args):
+    if args.breaker_threshold <= 0:
+        return None
+    return CircuitBreaker(threshold=args.breaker_threshold, cooldown=args.breaker_cooldown)
+
+def open_fallback(args):
+    """LastKnownGood snapshot (None with --no-fallback or --offline)."""
+    if args.no_fallback or args.offline:
+        return None
+    return LastKnownGood(args.fallback, precision=args.precision)
+
+def open_cache(args):
+    if args.no_cache:
+        return None
+    return RegionCache(args.cache_path, ttl=args.cache_ttl, precision=args.precision, refresh=args.refresh)
+
+def signal_list(args):
+    """--signals if given, else the single --signal."""
+    if args.signals:
+        return list(dict.fromkeys(s.strip() for s in args.signals.split(",") if s.strip()))
+    return [args.signal]
+
+def resolve_kwargs(args):
+    """Shared resolver knobs; the signal(s) are passed separately (see signal_list)."""
+    return dict(concurrency=args.concurrency, timeout=args.timeout,
+                retries=args.retries, rate=args.rate, max_rate=args.max_rate, precision=args.precision)
+
+def print_results(updated_rows, mapping, label, cache=None):
+    # Pretty print results to the prompt (no files)
+    print("\n=== Updated rows (tuple list) ===")
+    print(json.dumps(updated_rows, indent=2, ensure_ascii=False))
+
+    print(f"\n=== Simple mapping {{ {label}_region: watttime_abbrev }} ===")
+    print(json.dumps(mapping, indent=2, ensure_ascii=False), flush=True)
+
+    if cache is not None:
+        print(f"\n{cache.summary()}")